@@ -0,0 +1,315 @@
+"""
+Load test dan benchmark latency semua endpoint API.
+Setiap skenario dijalankan dua fase:
+- cold: cache memori (statistik GEE, map ID, histogram) dikosongkan sebelum
+  setiap request, mengukur jalur cache miss seperti instance yang baru start
+  (store di disk tetap dipakai). Hanya untuk mode in-process.
+- warm: setelah semua payload skenario dipanggil sekali, N request dikirim
+  dengan C worker paralel.
+Hasil berisi p50/p95/p99, throughput, dan jumlah error per fase dalam JSON
+sehingga dapat dibandingkan antar commit dengan --compare.
+
+Jalankan in-process dengan sumber NDVI lokal (tanpa jaringan):
+    python benchmark_api.py --concurrency 8 --requests 100 --output api_benchmark.json
+Terhadap server yang sedang berjalan:
+    python benchmark_api.py --url http://localhost:8080 --output api_benchmark.json
+Bandingkan dengan hasil commit sebelumnya:
+    python benchmark_api.py --compare api_benchmark_main.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Titik di dalam Kota Semarang: (kecamatan, latitude, longitude)
+BENCHMARK_DISTRICTS = [
+    ('Semarang Tengah', -7.0051, 110.4381),
+    ('Candisari', -7.0500, 110.4000),
+    ('Tembalang', -7.1000, 110.3500),
+    ('Genuk', -7.0833, 110.4167)
+]
+
+
+def _point(index):
+    _, latitude, longitude = BENCHMARK_DISTRICTS[index % len(BENCHMARK_DISTRICTS)]
+    return {'latitude': latitude, 'longitude': longitude}
+
+
+def _feature_row(index):
+    return dict(_point(index), ndvi_mean=0.3 + 0.1 * index, ndvi_min=0.05, ndvi_max=0.8)
+
+
+# Skenario: nama -> (method, path, list payload); request ke-i memakai payload i % len
+SCENARIOS = {
+    'home': ('GET', '/', [None]),
+    'healthz': ('GET', '/healthz', [None]),
+    'readyz': ('GET', '/readyz', [None]),
+    'models': ('GET', '/api/models', [None]),
+    'cache_stats': ('GET', '/api/cache_stats', [None]),
+    'get_ndvi': ('POST', '/api/get_ndvi', [_point(i) for i in range(len(BENCHMARK_DISTRICTS))]),
+    'locate': ('POST', '/api/locate', [{'points': [_point(i) for i in range(len(BENCHMARK_DISTRICTS))]}]),
+    'get_ndvi_points': ('POST', '/api/get_ndvi_points', [
+        {'points': [_point(i) for i in range(len(BENCHMARK_DISTRICTS))], 'buffer_m': 100}
+    ]),
+    'predict': ('POST', '/api/predict', [_feature_row(i) for i in range(len(BENCHMARK_DISTRICTS))]),
+    'predict_batch': ('POST', '/api/predict_batch', [
+        {'rows': [_feature_row(i) for i in range(len(BENCHMARK_DISTRICTS))] * 25}
+    ]),
+    'get_ndvi_district': ('POST', '/api/get_ndvi_district', [
+        {'district_name': name} for name, _, _ in BENCHMARK_DISTRICTS
+    ]),
+    'analyze_district': ('POST', '/api/analyze_district', [
+        {'district_name': name} for name, _, _ in BENCHMARK_DISTRICTS
+    ]),
+    'analyze_city': ('POST', '/api/analyze_city', [{}]),
+    'get_city_ndvi_layer': ('POST', '/api/get_city_ndvi_layer', [{'city_name': 'Semarang'}]),
+    'get_semarang_districts': ('GET', '/api/get_semarang_districts', [None]),
+    'get_ndvi_layer': ('POST', '/api/get_ndvi_layer', [
+        {'district_name': name} for name, _, _ in BENCHMARK_DISTRICTS
+    ]),
+    'analyze_area': ('POST', '/api/analyze_area', [_feature_row(i) for i in range(len(BENCHMARK_DISTRICTS))]),
+    'predict_ndvi': ('POST', '/api/predict_ndvi', [
+        {'district_name': name, 'prediction_days': days}
+        for name, _, _ in BENCHMARK_DISTRICTS for days in (7, 30)
+    ]),
+    'predict_ndvi_all': ('POST', '/api/predict_ndvi_all', [{'prediction_days': 30, 'format': 'series'}]),
+    'detect_critical_areas': ('POST', '/api/detect_critical_areas', [
+        {'threshold_min': 0.1, 'threshold_max': 0.3},
+        {'threshold_min': 0.0, 'threshold_max': 0.2}
+    ])
+}
+
+
+class InProcessClient:
+    """Request ke app.py lewat Flask test client (satu client per thread)"""
+
+    def __init__(self):
+        # Default: tanpa jaringan, startup sinkron, tanpa thread background
+        os.environ.setdefault('NDVI_SOURCE', 'local')
+        os.environ.setdefault('APP_STARTUP_MODE', 'eager')
+        os.environ.setdefault('GEE_MAP_ID_REFRESH_INTERVAL', '0')
+        os.environ.setdefault('INGEST_INTERVAL', '0')
+        os.environ.setdefault('FORECAST_PRECOMPUTE', '0')
+        os.environ.setdefault('HISTOGRAM_PRECOMPUTE', '0')
+        import app
+        self.app = app
+        self._local = threading.local()
+        self.supports_cold = True
+
+    def request(self, method, path, payload):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.app.test_client()
+        response = client.open(path, method=method, json=payload)
+        response.get_data()
+        return response.status_code
+
+    def reset_caches(self):
+        """Kosongkan cache memori seperti instance baru; store di disk tetap"""
+        self.app.GEE_STATS_CACHE.clear()
+        self.app.GEE_MAP_ID_CACHE.clear()
+        self.app.HISTOGRAM_STORE.load()
+
+    def describe(self):
+        return {'mode': 'in-process', 'ndvi_source': self.app.NDVI_SOURCE.describe()}
+
+
+class HTTPClient:
+    """Request ke server yang sedang berjalan (urllib, tanpa dependency tambahan)"""
+
+    def __init__(self, base_url, timeout=120):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.supports_cold = False
+
+    def request(self, method, path, payload):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, method=method,
+            headers={'Content-Type': 'application/json'} if data is not None else {}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def reset_caches(self):
+        raise NotImplementedError("Fase cold hanya untuk mode in-process")
+
+    def describe(self):
+        return {'mode': 'http', 'url': self.base_url}
+
+
+def timed_request(client, method, path, payload):
+    """(latency ms, status code); status 0 jika request gagal total"""
+    start = time.perf_counter()
+    try:
+        status = client.request(method, path, payload)
+    except Exception as e:
+        print(f"Error {method} {path}: {e}")
+        status = 0
+    return (time.perf_counter() - start) * 1000, status
+
+
+def summarize(samples, wall_seconds):
+    """Ringkasan latency (ms), throughput, dan status dari list (latency, status)"""
+    latencies = np.array([latency for latency, _ in samples], dtype=np.float64)
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(count for status, count in statuses.items() if int(status) == 0 or int(status) >= 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'status_codes': statuses,
+        'wall_s': wall_seconds,
+        'throughput_rps': len(samples) / wall_seconds if wall_seconds > 0 else None,
+        'mean_ms': float(latencies.mean()),
+        'min_ms': float(latencies.min()),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max())
+    }
+
+
+def run_cold(client, scenario, runs):
+    """Satu request per run, cache memori dikosongkan sebelum setiap request"""
+    method, path, payloads = scenario
+    samples = []
+    start = time.perf_counter()
+    for i in range(runs):
+        client.reset_caches()
+        samples.append(timed_request(client, method, path, payloads[i % len(payloads)]))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def run_warm(client, scenario, requests_count, concurrency):
+    """Panaskan cache dengan semua payload, lalu kirim requests_count request paralel"""
+    method, path, payloads = scenario
+    for payload in payloads:
+        timed_request(client, method, path, payload)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(
+            lambda i: timed_request(client, method, path, payloads[i % len(payloads)]),
+            range(requests_count)
+        ))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def benchmark(client, scenario_names, requests_count, concurrency, cold_runs):
+    results = {
+        'created_at': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'target': client.describe(),
+        'concurrency': concurrency,
+        'requests': requests_count,
+        'cold_runs': cold_runs if client.supports_cold else 0,
+        'scenarios': {}
+    }
+
+    for name in scenario_names:
+        scenario = SCENARIOS[name]
+        print(f"Benchmark {name} ({scenario[0]} {scenario[1]})...")
+        entry = {'method': scenario[0], 'path': scenario[1]}
+        if client.supports_cold and cold_runs > 0:
+            entry['cold'] = run_cold(client, scenario, cold_runs)
+        entry['warm'] = run_warm(client, scenario, requests_count, concurrency)
+        results['scenarios'][name] = entry
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Bandingkan p95 warm/cold dengan hasil baseline.
+    Returns:
+        List (skenario, fase, p95 baseline, p95 sekarang, rasio) yang melewati threshold
+    """
+    regressions = []
+    print(f"\n{'skenario':<24} {'fase':<5} {'p95 lama':>10} {'p95 baru':>10} {'rasio':>7}")
+    for name, entry in results['scenarios'].items():
+        for phase in ('cold', 'warm'):
+            old = baseline.get('scenarios', {}).get(name, {}).get(phase)
+            new = entry.get(phase)
+            if not old or not new or not old['p95_ms']:
+                continue
+            ratio = new['p95_ms'] / old['p95_ms']
+            marker = '  <- regresi' if ratio > threshold else ''
+            print(f"{name:<24} {phase:<5} {old['p95_ms']:>10.1f} {new['p95_ms']:>10.1f} {ratio:>7.2f}{marker}")
+            if ratio > threshold:
+                regressions.append((name, phase, old['p95_ms'], new['p95_ms'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test dan benchmark latency endpoint API')
+    parser.add_argument('--url', default=None, help='Base URL server (default: in-process dengan test client)')
+    parser.add_argument('--scenarios', default=None,
+                        help=f"Daftar skenario dipisah koma (default semua: {', '.join(SCENARIOS)})")
+    parser.add_argument('--concurrency', type=int, default=8, help='Jumlah request paralel fase warm')
+    parser.add_argument('--requests', type=int, default=100, help='Jumlah request per skenario fase warm')
+    parser.add_argument('--cold-runs', type=int, default=5, help='Jumlah request cold per skenario (0 = lewati)')
+    parser.add_argument('--output', default=None, help='Simpan hasil sebagai JSON')
+    parser.add_argument('--compare', default=None, help='File JSON hasil sebelumnya untuk dibandingkan')
+    parser.add_argument('--regression-threshold', type=float, default=1.2,
+                        help='Rasio p95 baru/lama yang dianggap regresi')
+    args = parser.parse_args()
+
+    scenario_names = [s.strip() for s in args.scenarios.split(',')] if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Skenario tidak dikenal: {', '.join(unknown)}")
+
+    client = HTTPClient(args.url) if args.url else InProcessClient()
+    results = benchmark(client, scenario_names, args.requests, max(1, args.concurrency), args.cold_runs)
+
+    print(f"\n{'skenario':<24} {'fase':<5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'error':>6}")
+    for name, entry in results['scenarios'].items():
+        for phase in ('cold', 'warm'):
+            stats = entry.get(phase)
+            if stats:
+                print(f"{name:<24} {phase:<5} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+                      f"{stats['p99_ms']:>9.1f} {stats['throughput_rps']:>8.1f} {stats['errors']:>6}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nHasil disimpan di: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.regression_threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresi p95 di atas {args.regression_threshold:.2f}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
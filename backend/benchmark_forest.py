@@ -0,0 +1,160 @@
+"""
+Benchmark engine Random Forest datar (forest_engine.FlatForest) terhadap
+sklearn RandomForestClassifier: kesamaan output, latency, dan RSS.
+
+Jalankan:
+    python benchmark_forest.py --model models/rf_model.pkl --output forest_benchmark.json
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+from forest_engine import FlatForest, compile_model_file
+
+# Urutan kolom sample_features, sama dengan FEATURE_ORDER di app.py
+FEATURE_ORDER = ['ndvi_mean', 'ndvi_min', 'ndvi_max', 'longitude', 'latitude']
+
+# Pengukuran RSS dilakukan di proses terpisah agar tidak saling mempengaruhi
+RSS_PROBE = r"""
+import sys, json, resource
+import numpy as np
+engine, model_path, flat_dir = sys.argv[1:4]
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+before = rss_mb()
+if engine == 'sklearn':
+    import pickle
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+else:
+    from forest_engine import FlatForest
+    model = FlatForest.load(flat_dir)
+X = np.array([[0.5, 0.1, 0.8, 110.4, -7.0]])
+if engine == 'sklearn' and hasattr(model, 'feature_names_in_'):
+    import pandas as pd
+    X = pd.DataFrame(X, columns=model.feature_names_in_)
+model.predict_proba(X)
+print(json.dumps({'rss_before_mb': before, 'rss_after_mb': rss_mb()}))
+"""
+
+
+def sample_features(n_rows, seed=0):
+    """Fitur acak dalam rentang data training (NDVI dan area Semarang)"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(0.0, 1.0, n_rows),
+        rng.uniform(0.0, 0.4, n_rows),
+        rng.uniform(0.5, 1.0, n_rows),
+        rng.uniform(110.2, 110.6, n_rows),
+        rng.uniform(-7.2, -6.8, n_rows)
+    ])
+
+
+def model_inputs(model, X):
+    """
+    Susun ulang kolom X (urutan FEATURE_ORDER) ke urutan fitur model seperti
+    classify_vegetation di app.py. Returns: (input sklearn, array untuk FlatForest);
+    input sklearn berupa DataFrame bernama jika model di-fit dengan DataFrame.
+    """
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        return X, X
+    names = [str(name) for name in names]
+    X = X[:, [FEATURE_ORDER.index(name) for name in names]]
+    return pd.DataFrame(X, columns=names), X
+
+
+def time_call(fn, repeats):
+    """Latency per panggilan (ms): median dan p95"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'median_ms': timings[len(timings) // 2],
+        'p95_ms': timings[int(len(timings) * 0.95) - 1]
+    }
+
+
+def measure_rss(engine, model_path, flat_dir):
+    completed = subprocess.run(
+        [sys.executable, '-c', RSS_PROBE, engine, model_path, flat_dir],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['rss_delta_mb'] = result['rss_after_mb'] - result['rss_before_mb']
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FlatForest vs sklearn')
+    parser.add_argument('--model', default=os.path.join('models', 'rf_model.pkl'))
+    parser.add_argument('--rows', type=int, default=10000, help='Jumlah baris untuk cek kesamaan')
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--output', default=None, help='Simpan hasil sebagai JSON')
+    args = parser.parse_args()
+
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+
+    flat_dir = tempfile.mkdtemp(prefix='rf_flat_')
+    compile_model_file(args.model, flat_dir)
+    flat = FlatForest.load(flat_dir)
+
+    # Kesamaan output
+    X_sklearn, X_flat = model_inputs(model, sample_features(args.rows))
+    sklearn_proba = model.predict_proba(X_sklearn)
+    flat_proba = flat.predict_proba(X_flat)
+    max_abs_diff = float(np.abs(sklearn_proba - flat_proba).max())
+    same_class = bool((model.predict(X_sklearn) == flat.predict(X_flat)).all())
+
+    single, flat_single = X_sklearn[:1], X_flat[:1]
+    batch, flat_batch = X_sklearn[:1000], X_flat[:1000]
+    results = {
+        'n_trees': len(model.estimators_),
+        'equivalence': {'rows': args.rows, 'max_abs_diff': max_abs_diff, 'same_class': same_class},
+        'latency': {
+            'sklearn_single': time_call(lambda: model.predict_proba(single), args.repeats),
+            'flat_single': time_call(lambda: flat.predict_proba(flat_single), args.repeats),
+            'sklearn_batch_1000': time_call(lambda: model.predict_proba(batch), max(5, args.repeats // 20)),
+            'flat_batch_1000': time_call(lambda: flat.predict_proba(flat_batch), max(5, args.repeats // 20))
+        },
+        'rss': {
+            'sklearn': measure_rss('sklearn', os.path.abspath(args.model), flat_dir),
+            'flat_mmap': measure_rss('flat', os.path.abspath(args.model), flat_dir)
+        }
+    }
+
+    print(f"Pohon: {results['n_trees']}")
+    print(f"Kesamaan: max |diff| = {max_abs_diff:.2e}, kelas sama = {same_class}")
+    for name, stats in results['latency'].items():
+        print(f"  {name:<20} median {stats['median_ms']:.3f} ms  p95 {stats['p95_ms']:.3f} ms")
+    for name, stats in results['rss'].items():
+        print(f"  RSS {name:<16} +{stats['rss_delta_mb']:.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nHasil disimpan di: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Bandingkan engine LSTM NumPy (lstm_engine) dengan Keras/TensorFlow:
+kesamaan output dan latency untuk input (batch, 60, 1), serta rollout
+multi-horizon stateful terhadap menjalankan ulang sequence penuh per hari.
+Membutuhkan TensorFlow (requirements-training.txt).
+
+Jalankan:
+    python benchmark_lstm.py --model models/lstm_ndvi_model_60.h5 --horizon 30
+"""
+
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+
+from lstm_engine import NumpyLSTMModel
+
+
+def time_call(fn, repeats):
+    """Latency per panggilan (ms): median"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def rerun_rollout(model, x, steps, **kwargs):
+    """Rollout naif: sequence diperpanjang dan dijalankan ulang dari awal setiap hari"""
+    sequence = x
+    outputs = []
+    for _ in range(steps):
+        y = np.asarray(model.predict(sequence, **kwargs), dtype=np.float32)[:, :1]
+        outputs.append(y)
+        sequence = np.concatenate([sequence, y[:, None, :]], axis=1)
+    return np.concatenate(outputs, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark LSTM NumPy vs Keras')
+    parser.add_argument('--model', default=os.path.join('models', 'lstm_ndvi_model_60.h5'))
+    parser.add_argument('--batch', type=int, default=16)
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--horizon', type=int, default=30, help='Jumlah hari rollout')
+    parser.add_argument('--output', default=None, help='Simpan hasil sebagai JSON')
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model as tf_load_model
+
+    keras_model = tf_load_model(args.model, compile=False)
+    numpy_model = NumpyLSTMModel.load(args.model)
+
+    x = np.random.default_rng(0).random((args.batch, 60, 1), dtype=np.float32)
+    keras_output = keras_model.predict(x, verbose=0)
+    numpy_output = numpy_model.predict(x)
+
+    single = x[:1]
+    results = {
+        'max_abs_diff': float(np.abs(keras_output - numpy_output).max()),
+        'keras_single_ms': time_call(lambda: keras_model.predict(single, verbose=0), args.repeats),
+        'numpy_single_ms': time_call(lambda: numpy_model.predict(single), args.repeats),
+        'keras_batch_ms': time_call(lambda: keras_model.predict(x, verbose=0), args.repeats),
+        'numpy_batch_ms': time_call(lambda: numpy_model.predict(x), args.repeats)
+    }
+
+    # Rollout stateful harus sama dengan menjalankan ulang sequence yang diperpanjang
+    rollout_repeats = max(3, args.repeats // 10)
+    keras_rollout = rerun_rollout(keras_model, x, args.horizon, verbose=0)
+    numpy_rollout = numpy_model.rollout(x, args.horizon)[:, :, 0]
+    results.update({
+        'rollout_max_abs_diff': float(np.abs(keras_rollout - numpy_rollout).max()),
+        'keras_rerun_rollout_ms': time_call(lambda: rerun_rollout(keras_model, x, args.horizon, verbose=0), rollout_repeats),
+        'numpy_rerun_rollout_ms': time_call(lambda: rerun_rollout(numpy_model, x, args.horizon), rollout_repeats),
+        'numpy_stateful_rollout_ms': time_call(lambda: numpy_model.rollout(x, args.horizon), args.repeats)
+    })
+
+    for name, value in results.items():
+        print(f"{name:<26} {value:.3e}" if name.endswith('max_abs_diff') else f"{name:<26} {value:.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nHasil disimpan di: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
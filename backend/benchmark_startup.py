@@ -0,0 +1,98 @@
+"""
+Benchmark waktu import app.py dan waktu sampai semua dependency siap.
+Membandingkan mode startup eager (perilaku lama: semua dimuat saat import)
+dengan mode lazy (warm-up di background thread).
+
+Jalankan:
+    python benchmark_startup.py --runs 3 --output startup_benchmark.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+PROBE = r"""
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+app.STARTUP.wait('gee', 'district_catalog', 'rf_model', 'lstm_model', timeout=600)
+ready = time.perf_counter() - start
+print(json.dumps({'import_s': imported, 'ready_s': ready, 'dependencies': app.STARTUP.snapshot()}))
+"""
+
+# Import berat yang sebelumnya dilakukan app.py di level modul
+HEAVY_IMPORTS_PROBE = r"""
+import json, time
+timings = {}
+for module in ['tensorflow', 'plotly.graph_objects', 'scipy.interpolate', 'sklearn.ensemble']:
+    start = time.perf_counter()
+    try:
+        __import__(module)
+        timings[module] = time.perf_counter() - start
+    except ImportError:
+        timings[module] = None
+print(json.dumps(timings))
+"""
+
+
+def run_probe(code, env):
+    """Jalankan probe di proses Python baru (cold start) dan parse baris JSON terakhir"""
+    completed = subprocess.run(
+        [sys.executable, '-c', code],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    lines = [line for line in completed.stdout.splitlines() if line.startswith('{')]
+    if not lines:
+        raise RuntimeError(f"Probe gagal:\n{completed.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def benchmark(runs):
+    results = {'runs': runs, 'modes': {}}
+
+    for mode in ['eager', 'lazy']:
+        env = dict(os.environ, APP_STARTUP_MODE=mode, GEE_MAP_ID_REFRESH_INTERVAL='0')
+        samples = [run_probe(PROBE, env) for _ in range(runs)]
+        results['modes'][mode] = {
+            'import_s': [s['import_s'] for s in samples],
+            'ready_s': [s['ready_s'] for s in samples],
+            'median_import_s': sorted(s['import_s'] for s in samples)[runs // 2],
+            'median_ready_s': sorted(s['ready_s'] for s in samples)[runs // 2],
+            'dependencies': samples[-1]['dependencies']
+        }
+
+    results['heavy_imports_s'] = run_probe(HEAVY_IMPORTS_PROBE, dict(os.environ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold start app.py')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--output', default=None, help='Simpan hasil sebagai JSON')
+    args = parser.parse_args()
+
+    results = benchmark(args.runs)
+
+    print(f"{'mode':<8} {'import (s)':>12} {'ready (s)':>12}")
+    for mode, stats in results['modes'].items():
+        print(f"{mode:<8} {stats['median_import_s']:>12.3f} {stats['median_ready_s']:>12.3f}")
+
+    print("\nImport berat yang dulu dibayar saat import app.py:")
+    for module, seconds in results['heavy_imports_s'].items():
+        print(f"  {module:<22} {'tidak terinstall' if seconds is None else f'{seconds:.3f} s'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nHasil disimpan di: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Katalog kecamatan Kota Semarang yang dibangun sekali dari asset GCP
+dan disimpan ke disk, sehingga endpoint tidak perlu round trip GEE
+hanya untuk mengambil geometri, centroid, atau batas kota.
+
+Jalankan script ini untuk membangun ulang katalog:
+    python district_catalog.py
+"""
+
+import os
+import json
+from datetime import datetime
+
+import ee
+
+DISTRICT_ASSET = 'projects/projectaic-468717/assets/indonesia_kecamatan'
+CITY_NAME = 'Kota Semarang'
+CATALOG_PATH = os.path.join('data', 'district_catalog.json')
+CATALOG_VERSION = 1
+
+# Toleransi simplify (meter) yang sama dengan yang dipakai frontend sebelumnya
+SIMPLIFY_TOLERANCE = 100
+
+
+def _bbox_from_bounds(bounds_geojson):
+    """Ubah polygon bounds GeoJSON menjadi [min_lon, min_lat, max_lon, max_lat]"""
+    ring = bounds_geojson['coordinates'][0]
+    lons = [pt[0] for pt in ring]
+    lats = [pt[1] for pt in ring]
+    return [min(lons), min(lats), max(lons), max(lats)]
+
+
+def build_district_catalog():
+    """
+    Bangun katalog dari asset kecamatan dengan satu kali getInfo.
+    Semua turunan geometri (simplify, centroid, bounds, luas, dan batas kota
+    hasil dissolve) dihitung di sisi server lalu diambil sekaligus.
+    """
+    print(f"Membangun katalog kecamatan dari {DISTRICT_ASSET}...")
+
+    districts = ee.FeatureCollection(DISTRICT_ASSET) \
+        .filter(ee.Filter.eq('NAME_2', CITY_NAME))
+
+    def describe(feature):
+        geometry = feature.geometry()
+        return feature.set({
+            'simplified_geometry': geometry.simplify(SIMPLIFY_TOLERANCE),
+            'centroid': geometry.centroid(1).coordinates(),
+            'bounds': geometry.bounds(1),
+            'area_m2': geometry.area(1)
+        })
+
+    city_geometry = districts.geometry().dissolve()
+
+    payload = ee.Dictionary({
+        'districts': districts.map(describe),
+        'city_geometry': city_geometry,
+        'city_bounds': city_geometry.bounds(1),
+        'city_area_m2': city_geometry.area(1)
+    }).getInfo()
+
+    catalog_districts = {}
+    for feature in payload['districts']['features']:
+        properties = dict(feature['properties'])
+        name = properties.get('NAME_3', '')
+        if not name:
+            continue
+
+        simplified_geometry = properties.pop('simplified_geometry', None)
+        centroid = properties.pop('centroid', None)
+        bounds = properties.pop('bounds', None)
+        area_m2 = properties.pop('area_m2', None)
+
+        catalog_districts[name] = {
+            'name': name,
+            'geometry': feature['geometry'],
+            'simplified_geometry': simplified_geometry,
+            # centroid disimpan sebagai [latitude, longitude] seperti di app.py
+            'centroid': [centroid[1], centroid[0]] if centroid else None,
+            'bbox': _bbox_from_bounds(bounds) if bounds else None,
+            'area_km2': area_m2 / 1e6 if area_m2 is not None else None,
+            'properties': properties
+        }
+
+    catalog = {
+        'version': CATALOG_VERSION,
+        'built_at': datetime.now().isoformat(),
+        'asset': DISTRICT_ASSET,
+        'districts': catalog_districts,
+        'city': {
+            'name': CITY_NAME,
+            'geometry': payload['city_geometry'],
+            'bounds': payload['city_bounds'],
+            'bbox': _bbox_from_bounds(payload['city_bounds']),
+            'area_km2': payload['city_area_m2'] / 1e6
+        }
+    }
+
+    print(f"Katalog berisi {len(catalog_districts)} kecamatan")
+    return catalog
+
+
+def save_district_catalog(catalog, path=CATALOG_PATH):
+    """Simpan katalog ke disk secara atomik"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(catalog, f)
+    os.replace(tmp_path, path)
+
+    print(f"Katalog kecamatan disimpan di: {path}")
+
+
+def load_district_catalog(path=CATALOG_PATH, build_if_missing=True):
+    """
+    Load katalog dari disk. Jika belum ada (atau versinya berbeda),
+    bangun dari GEE lalu simpan. Mengembalikan None jika keduanya gagal.
+    """
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                catalog = json.load(f)
+            if catalog.get('version') == CATALOG_VERSION:
+                print(f"Katalog kecamatan dimuat dari {path} ({len(catalog['districts'])} kecamatan)")
+                return catalog
+            print("Versi katalog kecamatan berbeda, membangun ulang...")
+        elif not build_if_missing:
+            print(f"Katalog kecamatan tidak ditemukan: {path}")
+            return None
+
+        catalog = build_district_catalog()
+        save_district_catalog(catalog, path)
+        return catalog
+
+    except Exception as e:
+        print(f"Error loading district catalog: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    ee.Initialize(project='projectaic-468717')
+    save_district_catalog(build_district_catalog())
+    print("\nKatalog kecamatan selesai dibangun!")
@@ -0,0 +1,89 @@
+"""
+Lock file eksklusif antar-proses untuk store lokal yang ditulis bersamaan
+oleh server dan CLI (mis. ingest.py). Memakai fcntl.flock di Linux/macOS dan
+msvcrt.locking di Windows, ditambah threading.Lock untuk thread dalam satu proses.
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK menyerah setelah ~10 detik; coba lagi sampai dapat
+            continue
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Context manager lock eksklusif pada file path (dibuat jika belum ada).
+    Reentrant dalam satu thread: hanya acquire terluar yang mengunci file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth:
+            self._depth += 1
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            f = open(self.path, 'a+b')
+            try:
+                _lock_file(f)
+            except Exception:
+                f.close()
+                raise
+            self._file = f
+            self._depth = 1
+        except Exception:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        self._depth -= 1
+        if self._depth:
+            self._thread_lock.release()
+            return
+        f, self._file = self._file, None
+        try:
+            _unlock_file(f)
+        finally:
+            f.close()
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
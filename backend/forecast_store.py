@@ -0,0 +1,132 @@
+"""
+Penyimpanan hasil prediksi NDVI yang sudah dimaterialisasi.
+Prediksi untuk periode historis tetap adalah fungsi deterministik dari
+(kecamatan, horizon, versi model/scaler, periode data), sehingga semua
+kecamatan dan horizon umum dihitung sekali lalu disajikan dari file JSON.
+Hasil dengan versi berbeda dari versi aktif dianggap kadaluarsa.
+File bisa ditulis oleh beberapa worker dan materialize_forecasts.py: penulisan
+dan materialisasi memakai lock file, dan pembacaan memuat ulang file jika
+mtime-nya berubah.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+
+from file_lock import FileLock
+
+
+class ForecastStore:
+    """Hasil prediksi per (kecamatan, horizon) untuk satu versi"""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(f"{path}.lock")
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_file(self):
+        """Isi file dan stamp-nya; (None, stamp) jika belum ada atau rusak"""
+        stamp = self._file_stamp()
+        if stamp is None:
+            return None, None
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f), stamp
+        except Exception as e:
+            print(f"Error loading forecast store {self.path}: {e}")
+            return None, stamp
+
+    def _set_data(self, data, stamp):
+        with self._lock:
+            self._data = data
+            self._stamp = stamp
+
+    def load(self):
+        """Baca file hasil materialisasi; None jika belum ada atau rusak"""
+        data, stamp = self._read_file()
+        if data is None:
+            return None
+        self._set_data(data, stamp)
+        print(f"Forecast store versi {data.get('version')} dimuat: {len(data.get('forecasts', {}))} kecamatan")
+        return data
+
+    def refresh(self):
+        """Muat ulang jika file diubah proses lain sejak terakhir dibaca/ditulis"""
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        data, stamp = self._read_file()
+        if data is None:
+            return False
+        self._set_data(data, stamp)
+        return True
+
+    def exclusive(self):
+        """
+        Lock file antar-proses (reentrant) untuk materialisasi: pemegang lock
+        memeriksa ulang version() sehingga hanya satu proses yang menghitung
+        """
+        return self._file_lock
+
+    def version(self):
+        self.refresh()
+        data = self._data
+        return data.get('version') if data else None
+
+    def get(self, version, district_name, horizon):
+        """Hasil prediksi tersimpan; None jika tidak ada atau versi berbeda"""
+        self.refresh()
+        data = self._data
+        if not data or version is None or data.get('version') != version:
+            return None
+        return data['forecasts'].get(district_name, {}).get(str(horizon))
+
+    def replace(self, version, forecasts, horizons):
+        """
+        Simpan hasil materialisasi baru secara atomik lalu ganti data di memori
+        Args:
+            forecasts: Dict {kecamatan: {horizon: result}}
+        """
+        data = {
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'horizons': sorted(horizons),
+            'forecasts': {
+                name: {str(horizon): result for horizon, result in results.items()}
+                for name, results in forecasts.items()
+            }
+        }
+
+        with self._file_lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._set_data(data, self._file_stamp())
+        print(f"Forecast store versi {version} disimpan: {len(forecasts)} kecamatan x {len(horizons)} horizon")
+        return data
+
+    def describe(self):
+        self.refresh()
+        data = self._data
+        if not data:
+            return {'version': None, 'created_at': None, 'horizons': [], 'districts': 0}
+        return {
+            'version': data.get('version'),
+            'created_at': data.get('created_at'),
+            'horizons': data.get('horizons', []),
+            'districts': len(data.get('forecasts', {}))
+        }
@@ -0,0 +1,242 @@
+"""
+Engine inferensi Random Forest berbasis array NumPy datar.
+Model sklearn RandomForestClassifier di-compile menjadi array node yang
+kontigu (fitur, threshold, anak kiri/kanan, distribusi kelas di leaf) lalu
+disimpan sebagai file .npy yang bisa dibuka dengan np.load(mmap_mode='r').
+Evaluasi menelusuri semua pohon sekaligus secara tervektorisasi, sehingga
+satu baris cukup ~kedalaman pohon operasi NumPy.
+
+Setiap versi model ditulis ke subdirektori sendiri (<direktori>/<versi>/) dan
+file CURRENT menunjuk versi terbaru; artifact yang sudah ada tidak pernah ditimpa.
+
+Jalankan script ini untuk meng-compile model:
+    python forest_engine.py models/rf_model.pkl models/rf_model_flat
+"""
+
+import os
+import sys
+import json
+import uuid
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+
+ARRAY_NAMES = ['feature', 'threshold', 'children', 'values', 'roots']
+
+
+def compile_forest(model):
+    """
+    Ubah RandomForestClassifier menjadi dict array datar.
+    Node leaf menunjuk ke dirinya sendiri (threshold +inf) sehingga penelusuran
+    cukup diulang sebanyak kedalaman maksimum tanpa masking.
+    """
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(n_nodes)
+        is_leaf = tree.children_left == -1
+
+        feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+        threshold = np.where(is_leaf, np.inf, tree.threshold).astype(np.float64)
+        left = np.where(is_leaf, node_ids, tree.children_left) + offset
+        right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+        # Distribusi kelas dinormalisasi per node, sama seperti tree.predict_proba
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+
+        features.append(feature)
+        thresholds.append(threshold)
+        children.append(np.stack([left, right], axis=1).astype(np.int32))
+        values.append(value / totals)
+        roots.append(offset)
+
+        offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'children': np.concatenate(children),
+        'values': np.concatenate(values),
+        'roots': np.array(roots, dtype=np.int32)
+    }
+    meta = {
+        'n_trees': len(model.estimators_),
+        'n_nodes': int(offset),
+        'max_depth': int(max_depth),
+        'n_features': int(model.n_features_in_),
+        'classes': [int(c) for c in model.classes_],
+        'feature_names': [str(f) for f in getattr(model, 'feature_names_in_', [])]
+    }
+    return arrays, meta
+
+
+def flat_version_dir(directory, source_version):
+    """Subdirektori artifact untuk satu versi model sumber"""
+    name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(source_version))
+    return os.path.join(directory, name)
+
+
+def resolve_flat_dir(directory):
+    """
+    Direktori artifact yang berisi meta.json: directory itu sendiri (layout lama)
+    atau versi yang ditunjuk file CURRENT. None jika belum ada artifact.
+    """
+    if os.path.exists(os.path.join(directory, 'meta.json')):
+        return directory
+    pointer = os.path.join(directory, 'CURRENT')
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, 'r') as f:
+        path = os.path.join(directory, f.read().strip())
+    return path if os.path.exists(os.path.join(path, 'meta.json')) else None
+
+
+def _prune_flat_versions(directory, keep):
+    """Hapus versi lama selain yang ada di keep (file yang masih di-mmap tetap valid)"""
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name in keep or name.startswith('.tmp-') or not os.path.isdir(path):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def save_flat_forest(arrays, meta, directory, source_version=None):
+    """
+    Simpan array sebagai file .npy terpisah (mmap-able) dan meta.json di
+    subdirektori per versi lalu arahkan CURRENT ke versi tersebut.
+    Artifact ditulis ke direktori sementara baru lalu di-rename, sehingga file
+    yang sedang di-mmap oleh proses lain tidak pernah ditimpa. Mengembalikan
+    path direktori versi.
+    """
+    if source_version is None:
+        source_version = uuid.uuid4().hex[:12]
+    os.makedirs(directory, exist_ok=True)
+    target = flat_version_dir(directory, source_version)
+    previous = resolve_flat_dir(directory)
+
+    if not os.path.exists(os.path.join(target, 'meta.json')):
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=directory)
+        try:
+            for name in ARRAY_NAMES:
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(arrays[name]))
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump(dict(meta, source_version=source_version), f, indent=2)
+            try:
+                os.rename(tmp_dir, target)
+            except OSError:
+                # Worker lain sudah lebih dulu menulis versi yang sama
+                if not os.path.exists(os.path.join(target, 'meta.json')):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    pointer_tmp = os.path.join(directory, f'CURRENT.{os.getpid()}.tmp')
+    with open(pointer_tmp, 'w') as f:
+        f.write(os.path.basename(target))
+    os.replace(pointer_tmp, os.path.join(directory, 'CURRENT'))
+
+    keep = {os.path.basename(target)}
+    if previous is not None and previous != directory:
+        keep.add(os.path.basename(previous))
+    _prune_flat_versions(directory, keep)
+    return target
+
+
+def read_flat_meta(directory):
+    """Baca meta.json artifact (mengikuti CURRENT); None jika belum ada"""
+    directory = resolve_flat_dir(directory)
+    if directory is None:
+        return None
+    with open(os.path.join(directory, 'meta.json'), 'r') as f:
+        return json.load(f)
+
+
+class FlatForest:
+    """
+    Evaluator forest datar dengan antarmuka yang kompatibel dengan sklearn
+    (predict_proba, predict, classes_, feature_names_in_).
+    """
+
+    def __init__(self, arrays, meta):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = np.ascontiguousarray(arrays['children'][:, 0])
+        self.right = np.ascontiguousarray(arrays['children'][:, 1])
+        self.values = arrays['values']
+        self.roots = np.asarray(arrays['roots'])
+        self.max_depth = meta['max_depth']
+        self.n_features_in_ = meta['n_features']
+        self.classes_ = np.array(meta['classes'])
+        self.source_version = meta.get('source_version')
+        if meta.get('feature_names'):
+            self.feature_names_in_ = np.array(meta['feature_names'], dtype=object)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Load artifact; dengan mmap=True array tidak disalin ke heap proses"""
+        resolved = resolve_flat_dir(directory)
+        if resolved is None:
+            raise FileNotFoundError(f"Artifact forest tidak ditemukan: {directory}")
+        directory = resolved
+        meta = read_flat_meta(directory)
+        mmap_mode = 'r' if mmap else None
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        return cls(arrays, meta)
+
+    @classmethod
+    def from_model(cls, model):
+        arrays, meta = compile_forest(model)
+        return cls(arrays, meta)
+
+    def apply(self, X):
+        """Index leaf global untuk setiap (baris, pohon), shape (n_rows, n_trees)"""
+        # sklearn membandingkan fitur float32 dengan threshold float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def predict_proba(self, X):
+        """Rata-rata distribusi kelas leaf atas semua pohon"""
+        return self.values[self.apply(X)].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def compile_model_file(model_path, directory, source_version=None):
+    """Compile file pickle sklearn menjadi artifact forest datar"""
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    arrays, meta = compile_forest(model)
+    path = save_flat_forest(arrays, meta, directory, source_version)
+    print(f"Forest {meta['n_trees']} pohon / {meta['n_nodes']} node disimpan di: {path}")
+    return model
+
+
+if __name__ == "__main__":
+    model_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join('models', 'rf_model.pkl')
+    directory = sys.argv[2] if len(sys.argv) > 2 else os.path.join('models', 'rf_model_flat')
+
+    from model_registry import file_version
+    compile_model_file(model_path, directory, source_version=file_version(model_path))
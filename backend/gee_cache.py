@@ -0,0 +1,124 @@
+"""
+Cache in-process (TTL + LRU) untuk hasil statistik Google Earth Engine.
+Dipakai bersama oleh semua endpoint NDVI agar komposit dan reduksi yang
+identik untuk kecamatan dan periode yang sama tidak dihitung ulang.
+"""
+
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+
+class TTLCache:
+    """Cache dengan batas ukuran (LRU) dan masa berlaku per entry (TTL)"""
+
+    def __init__(self, maxsize=512, ttl=6 * 3600, name='cache'):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Dipanggil listener(nama cache, hit) setiap lookup (untuk metrik)
+        self.listener = None
+
+    def get(self, key, default=None):
+        """Ambil nilai jika ada dan belum kedaluwarsa"""
+        missing = object()
+        value = self._lookup(key, missing)
+        if self.listener is not None:
+            self.listener(self.name, value is not missing)
+        return default if value is missing else value
+
+    def _lookup(self, key, missing):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return missing
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return missing
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Simpan nilai, buang entry paling lama dipakai jika cache penuh"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def ttl_remaining(self, key):
+        """Sisa masa berlaku entry dalam detik (0 jika tidak ada/kedaluwarsa)"""
+        with self._lock:
+            item = self._data.get(key)
+        if item is None:
+            return 0
+        return max(0.0, item[0] - time.monotonic())
+
+    def get_or_compute(self, key, compute, ttl=None):
+        """
+        Ambil dari cache atau hitung dengan compute().
+        Exception dari compute() tidak di-cache sehingga fallback data simulasi
+        tidak pernah tersimpan.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        value = compute()
+        self.set(key, value, ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Counter hit/miss untuk monitoring"""
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': size,
+            'maxsize': self.maxsize,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': (self.hits / total) if total > 0 else 0.0
+        }
+
+
+def geometry_hash(geometry):
+    """Hash stabil untuk GeoJSON geometry (atau objek JSON lain) sebagai kunci cache"""
+    payload = json.dumps(geometry, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def rolling_date_range(days=30, today=None):
+    """
+    Periode bergulir N hari terakhir yang di-snap ke tanggal (bukan jam),
+    sehingga kunci cache berulang selama satu hari yang sama.
+    Returns:
+        Tuple (start_date_str, end_date_str) dengan format YYYY-MM-DD
+    """
+    end_date = today or date.today()
+    start_date = end_date - timedelta(days=days)
+    return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
@@ -0,0 +1,51 @@
+"""
+Ingestion inkremental data Sentinel-2 per kecamatan.
+Untuk setiap kecamatan hanya window NDVI yang lebih baru dari window
+terakhir tersimpan yang diambil dari GEE, ditambah statistik, histogram,
+dan map ID periode analyze_district, sehingga endpoint interaktif membaca
+data lokal.
+
+Jalankan sekali:
+    python ingest.py --concurrency 4
+Atau sebagai loop terjadwal (mis. setiap 6 jam):
+    python ingest.py --loop --interval 21600
+"""
+
+import os
+import time
+import argparse
+
+# Muat dependency secara sinkron; scheduler dan materialisasi in-process dimatikan
+os.environ.setdefault('APP_STARTUP_MODE', 'eager')
+os.environ['FORECAST_PRECOMPUTE'] = '0'
+os.environ['HISTOGRAM_PRECOMPUTE'] = '0'
+os.environ['INGEST_INTERVAL'] = '0'
+
+import app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingestion inkremental NDVI per kecamatan')
+    parser.add_argument('--districts', default=None, help='Daftar kecamatan dipisah koma (default semua)')
+    parser.add_argument('--concurrency', type=int, default=app.GEE_MAX_CONCURRENCY,
+                        help='Jumlah maksimal panggilan GEE paralel')
+    parser.add_argument('--loop', action='store_true', help='Jalankan berulang setiap --interval detik')
+    parser.add_argument('--interval', type=int, default=6 * 3600)
+    args = parser.parse_args()
+
+    if not app.STARTUP.is_ready('gee', 'district_catalog'):
+        raise SystemExit('GEE atau katalog kecamatan tidak tersedia')
+
+    district_names = [d.strip() for d in args.districts.split(',')] if args.districts else None
+
+    while True:
+        summary = app.run_ingestion(district_names, concurrency=args.concurrency)
+        print(f"Window baru: {summary['new_windows']}, statistik periode: {summary['window_stats']}, "
+              f"error: {summary['errors']}, durasi: {summary['elapsed_ms']:.0f} ms")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Runner dan scheduler untuk ingestion data GEE di background.
+Task dijalankan oleh sejumlah worker terbatas (batas konkurensi GEE) yang
+mengambil dari antrian berukuran tetap: producer tertahan saat antrian penuh
+(backpressure). Jika GEE menolak karena rate limit/kuota, semua worker
+berhenti sementara dengan backoff eksponensial lalu task dicoba ulang.
+Scheduler melewati satu siklus jika ingestion sebelumnya masih berjalan.
+"""
+
+import time
+import queue
+import threading
+from datetime import datetime
+
+# Potongan pesan error GEE yang menandakan rate limit / kuota
+RATE_LIMIT_MARKERS = ('too many', 'rate limit', 'quota', '429', 'resource exhausted')
+
+
+def is_rate_limited(error):
+    message = str(error).lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+class IngestionRunner:
+    """Eksekusi task dengan worker terbatas, antrian terbatas, dan backoff rate limit"""
+
+    def __init__(self, worker, concurrency=4, queue_size=None, max_retries=3, backoff_seconds=5.0):
+        """
+        Args:
+            worker: Fungsi worker(task) -> hasil
+            concurrency: Jumlah maksimal panggilan GEE paralel
+            queue_size: Kapasitas antrian task (default 2 x concurrency)
+        """
+        self.worker = worker
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size or 2 * self.concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _pause(self, attempt):
+        delay = self.backoff_seconds * (2 ** attempt)
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def _wait_if_paused(self):
+        while True:
+            with self._lock:
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 1.0))
+
+    def _run_task(self, task):
+        for attempt in range(self.max_retries + 1):
+            self._wait_if_paused()
+            try:
+                return True, self.worker(task)
+            except Exception as e:
+                if is_rate_limited(e) and attempt < self.max_retries:
+                    delay = self._pause(attempt)
+                    print(f"Rate limit GEE pada task {task}, backoff {delay:.0f} detik")
+                    continue
+                return False, str(e)
+
+    def run(self, tasks):
+        """
+        Jalankan semua task.
+        Returns:
+            Tuple (dict task -> hasil untuk task yang berhasil, dict task -> pesan error)
+        """
+        task_queue = queue.Queue(maxsize=self.queue_size)
+        results, errors = {}, {}
+        results_lock = threading.Lock()
+        done = object()
+
+        def consume():
+            while True:
+                task = task_queue.get()
+                try:
+                    if task is done:
+                        return
+                    ok, value = self._run_task(task)
+                    with results_lock:
+                        (results if ok else errors)[task] = value
+                finally:
+                    task_queue.task_done()
+
+        workers = [
+            threading.Thread(target=consume, name=f'ingest-worker-{i}', daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in workers:
+            thread.start()
+
+        # put() tertahan saat antrian penuh sehingga task tidak menumpuk di memori
+        for task in tasks:
+            task_queue.put(task)
+        for _ in workers:
+            task_queue.put(done)
+        for thread in workers:
+            thread.join()
+
+        return results, errors
+
+
+class IngestionScheduler:
+    """Loop in-process yang menjalankan job setiap interval detik (tanpa tumpang tindih)"""
+
+    def __init__(self, job, interval):
+        self.job = job
+        self.interval = interval
+        self._running = threading.Lock()
+        self._thread = None
+        self.last_started = None
+        self.last_finished = None
+        self.last_summary = None
+        self.last_error = None
+        self.skipped = 0
+
+    def run_once(self):
+        """Jalankan job sekarang; False jika job sebelumnya masih berjalan"""
+        if not self._running.acquire(blocking=False):
+            self.skipped += 1
+            print("Ingestion sebelumnya masih berjalan, siklus ini dilewati")
+            return False
+        try:
+            self.last_started = datetime.now().isoformat()
+            self.last_summary = self.job()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error in ingestion job: {e}")
+        finally:
+            self.last_finished = datetime.now().isoformat()
+            self._running.release()
+        return True
+
+    def start(self):
+        """Mulai thread scheduler; None jika interval <= 0 atau sudah berjalan"""
+        if self.interval <= 0:
+            print("Ingestion terjadwal dinonaktifkan")
+            return None
+        if self._thread is not None:
+            return self._thread
+
+        def loop():
+            while True:
+                self.run_once()
+                time.sleep(self.interval)
+
+        self._thread = threading.Thread(target=loop, name='ingestion-scheduler', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def describe(self):
+        return {
+            'interval_seconds': self.interval,
+            'scheduled': self._thread is not None,
+            'running': self._running.locked(),
+            'last_started': self.last_started,
+            'last_finished': self.last_finished,
+            'last_summary': self.last_summary,
+            'last_error': self.last_error,
+            'skipped_cycles': self.skipped
+        }
@@ -0,0 +1,228 @@
+"""
+Engine inferensi LSTM berbasis NumPy untuk model Keras Sequential (.h5)
+seperti lstm_ndvi_model_60.h5 dari download_model.py:
+LSTM(50, return_sequences=True) -> LSTM(50) -> Dense(25) -> Dense(1).
+
+Bobot dibaca langsung dari file HDF5 dengan h5py sehingga TensorFlow hanya
+dibutuhkan untuk training. Forward pass memakai operasi gate tervektorisasi
+dan dapat memproses banyak sequence sekaligus (batch).
+
+Prediksi multi-horizon dilakukan secara autoregresif (rollout): state h/c
+setiap layer dibawa dari window input, sehingga setiap hari tambahan hanya
+membutuhkan satu langkah sel per layer, bukan menjalankan ulang 60 timestep.
+"""
+
+import json
+
+import numpy as np
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    None: lambda x: x,
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'relu': lambda x: np.maximum(x, 0.0)
+}
+
+
+def _activation(name):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Aktivasi tidak didukung: {name}")
+    return ACTIVATIONS[name]
+
+
+class LSTMLayer:
+    """Layer LSTM Keras (urutan gate i, f, c, o)"""
+
+    def __init__(self, kernel, recurrent_kernel, bias, config):
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.recurrent_kernel = np.asarray(recurrent_kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32) if bias is not None else None
+        self.units = self.recurrent_kernel.shape[0]
+        self.return_sequences = config.get('return_sequences', False)
+        self.activation = _activation(config.get('activation', 'tanh'))
+        self.recurrent_activation = _activation(config.get('recurrent_activation', 'sigmoid'))
+        if config.get('go_backwards') or config.get('stateful'):
+            raise ValueError("LSTM go_backwards/stateful tidak didukung")
+
+    def initial_state(self, batch_size):
+        zeros = np.zeros((batch_size, self.units), dtype=np.float32)
+        return zeros, zeros.copy()
+
+    def step(self, x_projected, state):
+        """
+        Satu langkah sel LSTM.
+        Args:
+            x_projected: x_t @ kernel + bias, shape (batch, 4 * units)
+            state: Tuple (h, c)
+        """
+        h, c = state
+        u = self.units
+        z = x_projected + h @ self.recurrent_kernel
+
+        i = self.recurrent_activation(z[:, :u])
+        f = self.recurrent_activation(z[:, u:2 * u])
+        g = self.activation(z[:, 2 * u:3 * u])
+        o = self.recurrent_activation(z[:, 3 * u:])
+
+        c = f * c + i * g
+        h = o * self.activation(c)
+        return h, (h, c)
+
+    def project(self, x):
+        """Proyeksi input untuk semua timestep sekaligus: (batch, T, 4 * units)"""
+        projected = x @ self.kernel
+        if self.bias is not None:
+            projected = projected + self.bias
+        return projected
+
+    def forward(self, x, state=None):
+        """
+        Jalankan sequence (batch, T, features).
+        Returns:
+            Tuple (output, state akhir); output berupa sequence jika return_sequences
+        """
+        projected = self.project(x)
+        state = state or self.initial_state(x.shape[0])
+
+        outputs = []
+        h = state[0]
+        for t in range(x.shape[1]):
+            h, state = self.step(projected[:, t], state)
+            if self.return_sequences:
+                outputs.append(h)
+
+        output = np.stack(outputs, axis=1) if self.return_sequences else h
+        return output, state
+
+
+class DenseLayer:
+    def __init__(self, kernel, bias, config):
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32) if bias is not None else None
+        self.activation = _activation(config.get('activation', 'linear'))
+
+    def forward(self, x):
+        y = x @ self.kernel
+        if self.bias is not None:
+            y = y + self.bias
+        return self.activation(y)
+
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _read_layer_weights(weights_group, layer_name):
+    """Baca bobot satu layer sesuai urutan atribut weight_names"""
+    group = weights_group[layer_name]
+    names = [_decode(name) for name in group.attrs.get('weight_names', [])]
+    weights = {}
+    for name in names:
+        # mis. 'lstm/lstm_cell/kernel:0' -> 'kernel'
+        key = name.split('/')[-1].split(':')[0]
+        weights[key] = group[name][()]
+    return weights
+
+
+class NumpyLSTMModel:
+    """
+    Model Sequential (LSTM + Dense) untuk inferensi tanpa TensorFlow.
+    Antarmuka predict(x, verbose=0) kompatibel dengan model Keras.
+    """
+
+    def __init__(self, lstm_layers, dense_layers):
+        self.lstm_layers = lstm_layers
+        self.dense_layers = dense_layers
+
+    @classmethod
+    def load(cls, path):
+        """Load arsitektur dan bobot dari file .h5 Keras"""
+        import h5py
+
+        with h5py.File(path, 'r') as f:
+            model_config = json.loads(_decode(f.attrs['model_config']))
+            weights_group = f['model_weights'] if 'model_weights' in f else f
+
+            layer_configs = model_config['config']
+            if isinstance(layer_configs, dict):
+                layer_configs = layer_configs['layers']
+
+            lstm_layers, dense_layers = [], []
+            for layer in layer_configs:
+                class_name = layer['class_name']
+                config = layer['config']
+                if class_name == 'InputLayer':
+                    continue
+
+                weights = _read_layer_weights(weights_group, config['name'])
+                if class_name == 'LSTM':
+                    if dense_layers:
+                        raise ValueError("LSTM setelah Dense tidak didukung")
+                    lstm_layers.append(LSTMLayer(
+                        weights['kernel'], weights['recurrent_kernel'], weights.get('bias'), config
+                    ))
+                elif class_name == 'Dense':
+                    dense_layers.append(DenseLayer(weights['kernel'], weights.get('bias'), config))
+                elif class_name == 'Dropout':
+                    continue  # Tidak aktif saat inferensi
+                else:
+                    raise ValueError(f"Layer tidak didukung: {class_name}")
+
+        print(f"Model LSTM NumPy dimuat: {len(lstm_layers)} LSTM, {len(dense_layers)} Dense")
+        return cls(lstm_layers, dense_layers)
+
+    def head(self, h):
+        """Layer Dense setelah LSTM terakhir"""
+        for layer in self.dense_layers:
+            h = layer.forward(h)
+        return h
+
+    def predict(self, x, verbose=0, batch_size=None):
+        """Forward pass untuk input (batch, T, features); output (batch, units Dense terakhir)"""
+        h = np.asarray(x, dtype=np.float32)
+        for layer in self.lstm_layers:
+            h, _ = layer.forward(h)
+        return self.head(h)
+
+    def rollout(self, x, steps):
+        """
+        Prediksi autoregresif: setiap prediksi menjadi input timestep berikutnya.
+        Hasil langkah ke-k sama dengan predict() atas window ditambah k-1
+        prediksi sebelumnya, tetapi dihitung dengan satu langkah sel per layer.
+        Args:
+            x: Window input (batch, T, features)
+            steps: Jumlah langkah prediksi
+        Returns:
+            Numpy array (batch, steps, features)
+        """
+        h = np.asarray(x, dtype=np.float32)
+        states = []
+        for layer in self.lstm_layers:
+            h, state = layer.forward(h)
+            states.append(state)
+        y = self.head(h)
+
+        n_features = self.lstm_layers[0].kernel.shape[0]
+        if y.shape[1] != n_features:
+            raise ValueError(f"Output model ({y.shape[1]}) tidak sama dengan jumlah fitur input ({n_features})")
+
+        outputs = [y]
+        for _ in range(steps - 1):
+            h = y
+            for index, layer in enumerate(self.lstm_layers):
+                h, states[index] = layer.step(layer.project(h), states[index])
+            y = self.head(h)
+            outputs.append(y)
+
+        return np.stack(outputs, axis=1)
@@ -0,0 +1,36 @@
+"""
+Materialisasi prediksi NDVI LSTM untuk semua kecamatan dan horizon umum.
+Hasil disimpan di data/forecast_cache.json dengan versi model/scaler/data
+sehingga /api/predict_ndvi dapat menyajikannya tanpa GEE maupun inferensi.
+
+Jalankan:
+    python materialize_forecasts.py --horizons 7,14,30,60,90
+"""
+
+import os
+import argparse
+
+# Muat dependency secara sinkron; materialisasi dijalankan di proses ini saja
+os.environ.setdefault('APP_STARTUP_MODE', 'eager')
+os.environ['FORECAST_PRECOMPUTE'] = '0'
+
+import app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Materialisasi prediksi NDVI per kecamatan')
+    parser.add_argument('--horizons', default=','.join(str(h) for h in app.FORECAST_HORIZONS),
+                        help='Daftar horizon (hari) dipisah koma')
+    parser.add_argument('--districts', default=None, help='Daftar kecamatan dipisah koma (default semua)')
+    args = parser.parse_args()
+
+    horizons = [int(h) for h in args.horizons.split(',') if h.strip()]
+    district_names = [d.strip() for d in args.districts.split(',')] if args.districts else None
+
+    summary = app.materialize_forecasts(horizons, district_names)
+    print(f"Versi: {summary['version']}")
+    print(f"Kecamatan: {len(summary['districts'])}, horizon: {summary['horizons']}")
+
+
+if __name__ == "__main__":
+    main()
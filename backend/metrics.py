@@ -0,0 +1,231 @@
+"""
+Metrik in-process dengan format teks Prometheus (tanpa dependency tambahan)
+dan pencatatan waktu per request untuk header Server-Timing.
+
+Setiap request memiliki RequestTrace (disimpan di ContextVar) yang mengumpulkan
+durasi dan jumlah kejadian per fase (round trip GEE, inferensi model, lookup
+cache, fallback). Kode di luar request (thread background) dicatat dengan
+endpoint 'background'.
+"""
+
+import math
+import time
+import threading
+from contextvars import ContextVar
+from collections import OrderedDict
+
+# Bucket latency (detik) untuk request HTTP, round trip GEE, dan inferensi model
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Label {self.name} harus {self.labelnames}, bukan {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        return list(zip(self.labelnames, key)) + list(extra)
+
+    def samples(self):
+        """List (nama sample, label [(nama, nilai)], nilai)"""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(f'{self.name}_total', self._labels(key), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, self._labels(key), value) for key, value in items]
+
+
+class CallbackGauge(_Metric):
+    """Gauge yang nilainya dibaca saat scrape: collect() -> list (dict label, nilai)"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames, collect):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def samples(self):
+        return [(self.name, self._labels(self._key(labels)), value) for labels, value in self.collect()]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        samples = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append((f'{self.name}_bucket', self._labels(key, [('le', _format_value(upper))]), cumulative))
+            samples.append((f'{self.name}_sum', self._labels(key), total))
+            samples.append((f'{self.name}_count', self._labels(key), count))
+        return samples
+
+
+class MetricsRegistry:
+    """Kumpulan metrik yang dirender bersama untuk endpoint /metrics"""
+
+    def __init__(self):
+        self._metrics = OrderedDict()
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metrik {metric.name} sudah terdaftar")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Format teks Prometheus (exposition format 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for sample_name, labels, value in metric.samples():
+                lines.append(f'{sample_name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class RequestTrace:
+    """Durasi dan jumlah kejadian per fase selama satu request"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.status = 500
+        self.phases = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds=None, detail=None):
+        """Catat satu kejadian fase (seconds None = hanya dihitung, mis. cache hit)"""
+        with self._lock:
+            entry = self.phases.setdefault(phase, {'count': 0, 'seconds': 0.0, 'details': OrderedDict()})
+            entry['count'] += 1
+            if seconds is not None:
+                entry['seconds'] += seconds
+            if detail is not None:
+                entry['details'][detail] = entry['details'].get(detail, 0) + 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Nilai header Server-Timing: total request lalu setiap fase"""
+        parts = [f'total;dur={self.elapsed() * 1000:.1f}']
+        with self._lock:
+            phases = list(self.phases.items())
+        for phase, entry in phases:
+            details = ' '.join(f'{name}={count}' for name, count in entry['details'].items())
+            desc = details or f"{entry['count']}x"
+            if entry['seconds']:
+                parts.append(f'{phase};dur={entry["seconds"] * 1000:.1f};desc="{desc}"')
+            else:
+                parts.append(f'{phase};desc="{desc}"')
+        return ', '.join(parts)
+
+
+_CURRENT_TRACE = ContextVar('request_trace', default=None)
+
+
+def start_trace(endpoint):
+    """Mulai trace request; token dipakai untuk end_trace"""
+    trace = RequestTrace(endpoint)
+    return trace, _CURRENT_TRACE.set(trace)
+
+
+def end_trace(token):
+    _CURRENT_TRACE.reset(token)
+
+
+def current_trace():
+    return _CURRENT_TRACE.get()
+
+
+def current_endpoint():
+    """Route request yang sedang berjalan; 'background' di luar request"""
+    trace = _CURRENT_TRACE.get()
+    return trace.endpoint if trace is not None else 'background'
+
+
+def record_phase(phase, seconds=None, detail=None):
+    """Tambahkan kejadian ke trace request aktif (diabaikan di luar request)"""
+    trace = _CURRENT_TRACE.get()
+    if trace is not None:
+        trace.add(phase, seconds, detail)
@@ -0,0 +1,235 @@
+"""
+Registry model yang menyimpan satu instance termuat per artifact dan versi.
+Artifact di disk dipantau (mtime/ukuran lalu hash) oleh thread watcher dan
+di-hot-swap secara atomik, sehingga request tidak pernah membayar biaya
+deserialisasi. Load yang gagal disimpan dan hanya dicoba ulang oleh watcher.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from datetime import datetime
+
+
+def file_version(path):
+    """Hash SHA-256 (dipendekkan) dari isi file sebagai versi artifact"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def artifact_version(paths):
+    """
+    Versi gabungan artifact yang terdiri dari beberapa file (mis. model + scaler).
+    Untuk satu file sama dengan file_version; file yang belum ada dilewati.
+    """
+    versions = [file_version(path) for path in paths if os.path.exists(path)]
+    if len(paths) == 1:
+        return versions[0] if versions else None
+    return hashlib.sha256(':'.join(versions).encode('utf-8')).hexdigest()[:12]
+
+
+def _rss_bytes():
+    """Resident set size proses dari /proc/self/statm; None jika tidak tersedia (non-Linux)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _file_signature(path):
+    """Signature murah (mtime, ukuran) untuk mendeteksi perubahan file"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+class ModelRegistry:
+    """Singleton per proses untuk model yang dimuat dari file"""
+
+    def __init__(self, retry_interval=60):
+        """
+        Args:
+            retry_interval: Jeda minimum (detik) sebelum watcher mencoba ulang load
+                yang gagal jika artifact di disk tidak berubah
+        """
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self.retry_interval = retry_interval
+
+    def register(self, name, path, loader, extra_paths=None):
+        """
+        Daftarkan artifact. loader() mengembalikan objek model dan boleh
+        membuat file-nya jika belum ada (mis. melatih model baru).
+        extra_paths: file pendukung (mis. scaler) yang ikut menentukan versi
+        dan memicu reload saat berubah.
+        """
+        with self._lock:
+            self._entries[name] = {
+                'path': path,
+                'paths': [path] + list(extra_paths or []),
+                'loader': loader,
+                'model': None,
+                'version': None,
+                'signature': None,
+                'loaded_at': None,
+                'load_time_ms': None,
+                'rss_delta_bytes': None,
+                'artifact_bytes': None,
+                'error': None,
+                'failed_at': None,
+                'failed_signature': None,
+                'load_lock': threading.Lock()
+            }
+
+    def _load(self, name):
+        """
+        Muat artifact lalu swap entry secara atomik; mengembalikan model baru.
+        Kegagalan (None atau exception) dicatat di entry dan mengembalikan None.
+        """
+        entry = self._entries[name]
+
+        with entry['load_lock']:
+            # Request lain mungkin sudah memuat (atau gagal memuat) artifact yang sama
+            # selama kita menunggu lock; jangan memuat ulang
+            signature = tuple(_file_signature(path) for path in entry['paths'])
+            if entry['model'] is not None and signature == entry['signature']:
+                return entry['model']
+            if entry['model'] is None and not self._retry_due(entry, signature):
+                return None
+
+            # Delta RSS hanya perkiraan: alokasi thread lain selama load ikut terhitung
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+
+            try:
+                model = entry['loader']()
+                error = None if model is not None else 'loader mengembalikan None'
+            except Exception as e:
+                model, error = None, str(e)
+            load_time_ms = (time.perf_counter() - start) * 1000
+            rss_after = _rss_bytes()
+
+            if model is None:
+                print(f"Model {name} gagal dimuat: {error}")
+                with self._lock:
+                    entry.update({
+                        'error': error,
+                        'failed_at': time.time(),
+                        'failed_signature': signature
+                    })
+                return None
+
+            signature = tuple(_file_signature(path) for path in entry['paths'])
+            version = artifact_version(entry['paths']) if signature[0] else None
+
+            with self._lock:
+                entry.update({
+                    'model': model,
+                    'version': version,
+                    'signature': signature,
+                    'loaded_at': datetime.now().isoformat(),
+                    'load_time_ms': round(load_time_ms, 1),
+                    'rss_delta_bytes': (
+                        max(0, rss_after - rss_before) if rss_before is not None and rss_after is not None else None
+                    ),
+                    'artifact_bytes': sum(item[1] for item in signature if item is not None),
+                    'error': None,
+                    'failed_at': None,
+                    'failed_signature': None
+                })
+
+            print(f"Model {name} versi {version} dimuat dalam {load_time_ms:.0f} ms")
+            return model
+
+    def get(self, name):
+        """
+        Ambil model aktif; hanya memuat dari disk jika belum pernah dicoba.
+        Setelah load gagal mengembalikan None sampai watcher berhasil memuat ulang.
+        """
+        entry = self._entries[name]
+        model = entry['model']
+        if model is None and entry['failed_at'] is None:
+            model = self._load(name)
+        return model
+
+    def _retry_due(self, entry, signature):
+        """Load gagal boleh dicoba ulang jika artifact berubah atau retry_interval terlewati"""
+        if entry['failed_at'] is None:
+            return True
+        return signature != entry['failed_signature'] or time.time() - entry['failed_at'] >= self.retry_interval
+
+    def version(self, name):
+        """Versi artifact yang sedang aktif; None jika belum dimuat"""
+        return self._entries[name]['version']
+
+    def check_for_updates(self):
+        """Muat ulang artifact yang berubah di disk (dipanggil oleh watcher)"""
+        reloaded = []
+        for name, entry in list(self._entries.items()):
+            signature = tuple(_file_signature(path) for path in entry['paths'])
+            if entry['model'] is None:
+                if entry['failed_at'] is not None and self._retry_due(entry, signature):
+                    print(f"Mencoba ulang memuat model {name}...")
+                    if self._load(name) is not None:
+                        reloaded.append(name)
+                continue
+
+            if signature[0] is None or signature == entry['signature'] or not self._retry_due(entry, signature):
+                continue
+
+            # mtime/ukuran berubah; bandingkan hash agar touch tidak memicu reload
+            version = artifact_version(entry['paths'])
+            if version == entry['version']:
+                entry['signature'] = signature
+                continue
+
+            print(f"Artifact {entry['path']} berubah ({entry['version']} -> {version}), memuat ulang {name}...")
+            # Jika gagal, model lama tetap aktif dan versi baru dicoba ulang setelah retry_interval
+            if self._load(name) is not None:
+                reloaded.append(name)
+        return reloaded
+
+    def start_watcher(self, interval=5):
+        """Jalankan thread background yang memantau perubahan artifact"""
+        if self._watcher is not None or interval <= 0:
+            return self._watcher
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_for_updates()
+                except Exception as e:
+                    print(f"Error in model watcher: {e}")
+
+        self._watcher = threading.Thread(target=run, name='model-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def describe(self):
+        """Info versi, waktu muat, footprint memori, dan error load terakhir per model"""
+        return {
+            name: {
+                'path': entry['path'],
+                'extra_paths': entry['paths'][1:],
+                'loaded': entry['model'] is not None,
+                'version': entry['version'],
+                'loaded_at': entry['loaded_at'],
+                'load_time_ms': entry['load_time_ms'],
+                'rss_delta_bytes': entry['rss_delta_bytes'],
+                'artifact_bytes': entry['artifact_bytes'],
+                'error': entry['error']
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+MODEL_REGISTRY = ModelRegistry()
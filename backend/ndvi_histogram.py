@@ -0,0 +1,326 @@
+"""
+Histogram NDVI bin tetap per kecamatan dan periode (window).
+Histogram 200 bin di rentang [-1, 1] dihitung sekali di GEE
+(ee.Reducer.fixedHistogram) lalu disimpan lokal. Persentase piksel kritis
+dan rata-rata NDVI untuk pasangan threshold apa pun dihitung dari jumlah
+kumulatif (cumsum) tanpa panggilan GEE; bin yang terpotong threshold
+diinterpolasi linear dengan asumsi piksel tersebar rata di dalam bin.
+
+Histogram juga berfungsi sebagai sketch yang dapat digabung: count per bin
+adalah jumlah piksel, sehingga menjumlahkan histogram beberapa kecamatan
+menghasilkan distribusi piksel gabungan dengan bobot yang benar.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from file_lock import FileLock
+
+HISTOGRAM_BINS = 200
+HISTOGRAM_MIN = -1.0
+HISTOGRAM_MAX = 1.0
+
+
+def bin_edges():
+    return np.linspace(HISTOGRAM_MIN, HISTOGRAM_MAX, HISTOGRAM_BINS + 1)
+
+
+def counts_from_fixed_histogram(rows):
+    """
+    Ubah output ee.Reducer.fixedHistogram ([[bucket_min, count], ...]) menjadi
+    array count sepanjang HISTOGRAM_BINS
+    """
+    counts = np.zeros(HISTOGRAM_BINS, dtype=np.float64)
+    if not rows:
+        return counts
+    width = (HISTOGRAM_MAX - HISTOGRAM_MIN) / HISTOGRAM_BINS
+    for bucket_min, count in rows:
+        index = int(round((bucket_min - HISTOGRAM_MIN) / width))
+        if 0 <= index < HISTOGRAM_BINS:
+            counts[index] += count or 0
+    return counts
+
+
+class NDVIHistogram:
+    """Histogram satu kecamatan dengan count dan jumlah NDVI kumulatif"""
+
+    def __init__(self, counts):
+        self.counts = np.asarray(counts, dtype=np.float64).reshape(-1)
+        if len(self.counts) != HISTOGRAM_BINS:
+            raise ValueError(f"Histogram harus {HISTOGRAM_BINS} bin, bukan {len(self.counts)}")
+        self.width = (HISTOGRAM_MAX - HISTOGRAM_MIN) / HISTOGRAM_BINS
+        self.edges = bin_edges()
+        centers = (self.edges[:-1] + self.edges[1:]) / 2
+        # cumulative[i] = total count bin 0..i-1 (panjang bins + 1)
+        self.cumulative = np.concatenate([[0.0], np.cumsum(self.counts)])
+        self.cumulative_sum = np.concatenate([[0.0], np.cumsum(self.counts * centers)])
+
+    @property
+    def total(self):
+        return float(self.cumulative[-1])
+
+    def _below(self, value):
+        """(count, jumlah NDVI) piksel dengan NDVI < value"""
+        position = (min(max(value, HISTOGRAM_MIN), HISTOGRAM_MAX) - HISTOGRAM_MIN) / self.width
+        index = min(int(position), HISTOGRAM_BINS)
+        count = self.cumulative[index]
+        total = self.cumulative_sum[index]
+        if index < HISTOGRAM_BINS:
+            fraction = position - index
+            partial = fraction * self.counts[index]
+            count += partial
+            total += partial * (self.edges[index] + fraction * self.width / 2)
+        return count, total
+
+    def between(self, low, high):
+        """(count, jumlah NDVI) piksel dengan low <= NDVI <= high"""
+        if high < low:
+            return 0.0, 0.0
+        count_high, sum_high = self._below(high)
+        count_low, sum_low = self._below(low)
+        return float(count_high - count_low), float(sum_high - sum_low)
+
+    def mean(self):
+        total = self.total
+        return float(self.cumulative_sum[-1] / total) if total > 0 else None
+
+    def threshold_summary(self, threshold_min, threshold_max, valid_min=0.0):
+        """
+        Ringkasan area kritis untuk satu pasangan threshold.
+        Persentase dihitung terhadap piksel valid (NDVI >= valid_min), sama
+        dengan band 'valid' pada reduksi GEE sebelumnya.
+        """
+        critical_count, critical_sum = self.between(threshold_min, threshold_max)
+        valid_count, _ = self.between(valid_min, HISTOGRAM_MAX)
+        return {
+            'critical_pixels': critical_count,
+            'valid_pixels': valid_count,
+            'critical_percentage': (critical_count / valid_count * 100) if valid_count > 0 else 0.0,
+            'critical_mean_ndvi': (critical_sum / critical_count) if critical_count > 0 else None
+        }
+
+    def quantile(self, q):
+        """Kuantil q (0-1) dengan interpolasi linear di dalam bin; None jika kosong"""
+        total = self.total
+        if total <= 0:
+            return None
+        target = min(max(q, 0.0), 1.0) * total
+        index = int(np.searchsorted(self.cumulative, target, side='left'))
+        index = min(max(index, 1), HISTOGRAM_BINS)
+        count = self.counts[index - 1]
+        fraction = (target - self.cumulative[index - 1]) / count if count > 0 else 0.0
+        return float(self.edges[index - 1] + fraction * self.width)
+
+    @classmethod
+    def merge(cls, histograms):
+        """Gabungkan beberapa histogram (jumlah count per bin)"""
+        histograms = list(histograms)
+        if not histograms:
+            return cls(np.zeros(HISTOGRAM_BINS))
+        return cls(np.sum([histogram.counts for histogram in histograms], axis=0))
+
+
+def simulated_histogram(mean, std, pixel_count):
+    """Histogram normal terpotong untuk data simulasi (fallback saat GEE tidak tersedia)"""
+    edges = bin_edges()
+    centers = (edges[:-1] + edges[1:]) / 2
+    density = np.exp(-0.5 * ((centers - mean) / max(std, 1e-3)) ** 2)
+    return NDVIHistogram(density / density.sum() * pixel_count)
+
+
+def merge_district_stats(district_stats):
+    """
+    Agregasi statistik NDVI banyak kecamatan dengan bobot jumlah piksel.
+    Mean dan std digabung secara eksak dari statistik GEE per kecamatan
+    (pooled variance); persentil dari histogram gabungan.
+    Args:
+        district_stats: List dict dengan ndvi_mean, ndvi_min, ndvi_max, ndvi_std, histogram
+    Returns:
+        Dict statistik gabungan; None jika tidak ada piksel
+    """
+    stats = [item for item in district_stats if item.get('histogram') is not None and item['histogram'].total > 0]
+    if not stats:
+        return None
+
+    merged = NDVIHistogram.merge(item['histogram'] for item in stats)
+    weights = np.array([item['histogram'].total for item in stats])
+    means = np.array([item['ndvi_mean'] for item in stats], dtype=np.float64)
+    stds = np.array([item['ndvi_std'] for item in stats], dtype=np.float64)
+    mean = float(np.average(means, weights=weights))
+    variance = float(np.average(stds ** 2 + (means - mean) ** 2, weights=weights))
+
+    return {
+        'ndvi_mean': mean,
+        'ndvi_min': float(min(item['ndvi_min'] for item in stats)),
+        'ndvi_max': float(max(item['ndvi_max'] for item in stats)),
+        'ndvi_std': float(np.sqrt(variance)),
+        'ndvi_p25': merged.quantile(0.25),
+        'ndvi_p50': merged.quantile(0.50),
+        'ndvi_p75': merged.quantile(0.75),
+        'pixel_count': merged.total,
+        'district_count': len(stats)
+    }
+
+
+def window_key(start_date, end_date):
+    return f"{start_date}_{end_date}"
+
+
+class HistogramStore:
+    """
+    Histogram dan statistik NDVI per (window, kecamatan) dalam satu file JSON.
+    Objek NDVIHistogram (dengan cumsum) dibuat sekali per entri lalu disimpan di memori.
+    File bisa ditulis oleh beberapa proses (server dan ingest.py): update memakai
+    lock file dan menggabungkan isi file terbaru, dan pembacaan memuat ulang
+    file jika mtime-nya berubah.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._data = self._empty()
+        self._histograms = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(f"{path}.lock")
+
+    @staticmethod
+    def _empty():
+        return {'bins': HISTOGRAM_BINS, 'range': [HISTOGRAM_MIN, HISTOGRAM_MAX], 'windows': {}}
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_file(self):
+        """Isi file dan stamp-nya; (None, stamp) jika belum ada, rusak, atau jumlah bin berbeda"""
+        stamp = self._file_stamp()
+        if stamp is None:
+            return None, None
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading histogram store {self.path}: {e}")
+            return None, stamp
+        if data.get('bins') != HISTOGRAM_BINS or data.get('range') != [HISTOGRAM_MIN, HISTOGRAM_MAX]:
+            print(f"Histogram store {self.path} memakai bin berbeda, diabaikan")
+            return None, stamp
+        return data, stamp
+
+    def _set_data(self, data, stamp):
+        with self._lock:
+            self._data = data
+            self._histograms = {}
+            self._stamp = stamp
+
+    def load(self):
+        """Baca file histogram; data kosong jika belum ada, rusak, atau jumlah bin berbeda"""
+        data, stamp = self._read_file()
+        if data is None:
+            return None
+        self._set_data(data, stamp)
+        districts = sum(len(window['districts']) for window in data['windows'].values())
+        print(f"Histogram store dimuat: {len(data['windows'])} window, {districts} entri kecamatan")
+        return data
+
+    def refresh(self):
+        """Muat ulang jika file diubah proses lain sejak terakhir dibaca/ditulis"""
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        data, stamp = self._read_file()
+        if data is None:
+            return False
+        self._set_data(data, stamp)
+        return True
+
+    def get(self, start_date, end_date, district_name):
+        """
+        Entri tersimpan {'stats', 'image_count', 'data_source', 'histogram': NDVIHistogram};
+        None jika belum ada
+        """
+        self.refresh()
+        key = (window_key(start_date, end_date), district_name)
+        with self._lock:
+            cached = self._histograms.get(key)
+            if cached is not None:
+                return cached
+            window = self._data['windows'].get(key[0])
+            entry = window['districts'].get(district_name) if window else None
+            if entry is None:
+                return None
+            cached = dict(entry, histogram=NDVIHistogram(entry['counts']))
+            cached.pop('counts')
+            self._histograms[key] = cached
+            return cached
+
+    def get_many(self, start_date, end_date, district_names):
+        entries = {}
+        for name in district_names:
+            entry = self.get(start_date, end_date, name)
+            if entry is not None:
+                entries[name] = entry
+        return entries
+
+    def update(self, start_date, end_date, entries, group=None, keep_latest=None):
+        """
+        Tambahkan/ganti entri satu window lalu simpan file secara atomik.
+        Di bawah lock file, isi file terbaru dibaca ulang dan digabung sehingga
+        entri yang ditulis proses lain tidak tertimpa.
+        Args:
+            entries: Dict {kecamatan: {'counts', 'stats', 'image_count', 'data_source'}}
+            group: Label window (mis. periode bergulir ingestion)
+            keep_latest: Jika diisi, hanya keep_latest window terbaru (end_date) dalam group yang disimpan
+        """
+        key = window_key(start_date, end_date)
+        with self._file_lock:
+            current, _ = self._read_file()
+            if current is None:
+                current = self._empty()
+            windows = dict(current['windows'])
+            window = windows.get(key, {'start_date': start_date, 'end_date': end_date, 'districts': {}})
+            districts = dict(window['districts'])
+            for name, entry in entries.items():
+                districts[name] = dict(entry, counts=[round(float(c), 4) for c in entry['counts']])
+            windows[key] = dict(window, districts=districts, updated_at=datetime.now().isoformat())
+            if group is not None:
+                windows[key]['group'] = group
+                if keep_latest is not None:
+                    grouped = sorted(
+                        (item for item in windows.items() if item[1].get('group') == group),
+                        key=lambda item: item[1]['end_date'], reverse=True
+                    )
+                    for old_key, _ in grouped[keep_latest:]:
+                        del windows[old_key]
+            data = dict(current, windows=windows)
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._set_data(data, self._file_stamp())
+
+        print(f"Histogram window {key} disimpan: {len(entries)} kecamatan")
+        return data
+
+    def describe(self):
+        self.refresh()
+        windows = self._data['windows']
+        return {
+            'bins': HISTOGRAM_BINS,
+            'range': [HISTOGRAM_MIN, HISTOGRAM_MAX],
+            'windows': {
+                key: {'districts': len(window['districts']), 'updated_at': window.get('updated_at')}
+                for key, window in windows.items()
+            }
+        }
@@ -0,0 +1,600 @@
+"""
+Sumber data NDVI yang dapat diganti: Google Earth Engine (produksi) atau
+sumber lokal (rekaman/sintetis) untuk load test dan profiling tanpa jaringan.
+Semua geometri dipertukarkan sebagai GeoJSON (dict); titik dengan radius
+memakai kunci tambahan 'buffer_m'. Hasil statistik memakai nama properti
+GEE dengan prefix band ('NDVI_mean', 'NDVI_p50', 'NDVI_histogram', ...).
+
+Pilih sumber dengan env NDVI_SOURCE=gee|local. Sumber lokal:
+- NDVI_SOURCE_RECORDING: file JSON hasil rekaman dari sumber GEE
+  (saat NDVI_SOURCE=gee, file yang sama diisi dengan respons GEE)
+- LOCAL_SOURCE_LATENCY_MS / LOCAL_SOURCE_JITTER_MS: latency buatan per panggilan
+Permintaan yang tidak ada di rekaman dijawab dengan data sintetis yang
+deterministik per (geometri, periode).
+"""
+
+import os
+import json
+import math
+import time
+import random
+import threading
+import zlib
+
+import numpy as np
+
+from gee_cache import geometry_hash
+from file_lock import FileLock
+from ndvi_histogram import (
+    HISTOGRAM_BINS, HISTOGRAM_MIN, HISTOGRAM_MAX, bin_edges, simulated_histogram
+)
+
+GEE_PROJECT = 'projectaic-468717'
+
+S2_SR = 'COPERNICUS/S2_SR_HARMONIZED'
+S2_TOA = 'COPERNICUS/S2_HARMONIZED'
+
+# Output reducer tanpa prefix band -> nama dengan prefix NDVI_
+STAT_NAMES = ('mean', 'min', 'max', 'stdDev', 'p25', 'p50', 'p75', 'count', 'histogram')
+
+
+def buffered_point(longitude, latitude, buffer_m):
+    """Geometri titik dengan radius buffer (meter)"""
+    return {'type': 'Point', 'coordinates': [longitude, latitude], 'buffer_m': buffer_m}
+
+
+def _prefixed(properties):
+    return {
+        (f'NDVI_{key}' if key in STAT_NAMES else key): value
+        for key, value in properties.items()
+    }
+
+
+class NDVISource:
+    """Antarmuka sumber data NDVI yang dipakai app.py"""
+
+    name = 'base'
+
+    def initialize(self):
+        """Siapkan koneksi; True jika siap"""
+        raise NotImplementedError
+
+    def load_district_catalog(self):
+        """Katalog kecamatan (format district_catalog.py); None jika gagal"""
+        raise NotImplementedError
+
+    def region_stats(self, geometry, start_date, end_date, scale=10, std=True, percentiles=(),
+                     histogram=False, count=False, collection=S2_SR):
+        """Statistik NDVI komposit median untuk satu geometri"""
+        raise NotImplementedError
+
+    def regions_stats(self, regions, start_date, end_date, scale=10, std=True, percentiles=(),
+                      histogram=False, count=False, image_count=False, collection=S2_SR, bounds=None):
+        """
+        Statistik NDVI untuk banyak geometri sekaligus (satu komposit)
+        Args:
+            regions: List (region_id, geometri)
+            bounds: Geometri untuk filter koleksi (default gabungan regions)
+        Returns:
+            List dict properti per region dengan kunci 'region_id'
+        """
+        raise NotImplementedError
+
+    def window_series(self, geometry, windows, scale=30):
+        """
+        NDVI rata-rata per periode komposit
+        Returns:
+            List dict per window: image_count, ndvi (None jika kosong), valid_pixels
+        """
+        raise NotImplementedError
+
+    def map_id(self, geometry, start_date, end_date, vis_params):
+        """Tile layer NDVI: dict tile_url, map_id, token"""
+        raise NotImplementedError
+
+    def describe(self):
+        return {'name': self.name}
+
+
+class Recording:
+    """
+    Respons sumber data yang direkam ke file JSON, dikunci per (method, argumen).
+    Beberapa proses bisa merekam ke file yang sama: save memakai lock file lalu
+    menggabungkan isi file terbaru sebelum menulis.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = FileLock(f"{path}.lock")
+        self.responses = self._read_file()
+        if self.responses:
+            print(f"Rekaman sumber NDVI dimuat: {len(self.responses)} respons dari {path}")
+
+    def _read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading NDVI source recording {self.path}: {e}")
+            return {}
+
+    @staticmethod
+    def key(method, *args):
+        return f"{method}:{geometry_hash(list(args))}"
+
+    def get(self, key):
+        return self.responses.get(key)
+
+    def save(self, key, value):
+        with self._lock:
+            responses = dict(self._read_file(), **self.responses)
+            responses[key] = value
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(responses, f)
+            os.replace(tmp_path, self.path)
+            self.responses = responses
+
+
+class GEENDVISource(NDVISource):
+    """Sentinel-2 dari Google Earth Engine"""
+
+    name = 'gee'
+
+    def __init__(self, recording_path=None):
+        self.recording = Recording(recording_path) if recording_path else None
+
+    def _record(self, method, args, compute):
+        value = compute()
+        if self.recording is not None:
+            self.recording.save(Recording.key(method, *args), value)
+        return value
+
+    def initialize(self):
+        """
+        Menginisialisasi Google Earth Engine tanpa interaksi.
+        Memakai service account dari GOOGLE_APPLICATION_CREDENTIALS jika ada,
+        atau kredensial default. Alur otentikasi interaktif hanya dijalankan
+        jika GEE_INTERACTIVE_AUTH=1 (untuk development lokal).
+        """
+        import ee
+        try:
+            key_file = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')
+
+            if key_file and os.path.exists(key_file):
+                with open(key_file, 'r') as f:
+                    service_account = os.environ.get('SERVICE_ACCOUNT_EMAIL') or json.load(f)['client_email']
+                credentials = ee.ServiceAccountCredentials(service_account, key_file)
+                ee.Initialize(credentials, project=GEE_PROJECT)
+                print(f"Google Earth Engine diinisialisasi dengan service account {service_account}")
+            else:
+                if os.environ.get('GEE_INTERACTIVE_AUTH') == '1':
+                    # Memicu alur otentikasi. Hanya perlu sekali per lingkungan.
+                    ee.Authenticate()
+                ee.Initialize(project=GEE_PROJECT)
+                print(f"Google Earth Engine berhasil diinisialisasi dengan project '{GEE_PROJECT}'")
+
+            print(f"Project number: 742903812893")
+            return True
+        except Exception as e:
+            print(f"Error inisialisasi GEE: {e}")
+            return False
+
+    def load_district_catalog(self):
+        from district_catalog import load_district_catalog
+        return load_district_catalog()
+
+    @staticmethod
+    def _geometry(geometry):
+        import ee
+        buffer_m = geometry.get('buffer_m')
+        ee_geometry = ee.Geometry({key: value for key, value in geometry.items() if key != 'buffer_m'})
+        return ee_geometry.buffer(buffer_m) if buffer_m else ee_geometry
+
+    @staticmethod
+    def _collection(collection_id, bounds, start_date, end_date):
+        import ee
+        return ee.ImageCollection(collection_id) \
+            .filterBounds(bounds) \
+            .filterDate(start_date, end_date) \
+            .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20))
+
+    @staticmethod
+    def _ndvi_composite(collection, collection_id):
+        """TOA: median NDVI per image; SR: NDVI dari komposit median band"""
+        if collection_id == S2_TOA:
+            return collection.map(
+                lambda image: image.normalizedDifference(['B8', 'B4']).rename('NDVI')
+            ).median()
+        return collection.median().normalizedDifference(['B8', 'B4']).rename('NDVI')
+
+    @staticmethod
+    def _reducer(std, percentiles, histogram, count):
+        import ee
+        reducer = ee.Reducer.mean().combine(reducer2=ee.Reducer.minMax(), sharedInputs=True)
+        if std:
+            reducer = reducer.combine(reducer2=ee.Reducer.stdDev(), sharedInputs=True)
+        if percentiles:
+            reducer = reducer.combine(reducer2=ee.Reducer.percentile(list(percentiles)), sharedInputs=True)
+        if count:
+            reducer = reducer.combine(reducer2=ee.Reducer.count(), sharedInputs=True)
+        if histogram:
+            reducer = reducer.combine(
+                reducer2=ee.Reducer.fixedHistogram(HISTOGRAM_MIN, HISTOGRAM_MAX, HISTOGRAM_BINS),
+                sharedInputs=True
+            )
+        return reducer
+
+    def region_stats(self, geometry, start_date, end_date, scale=10, std=True, percentiles=(),
+                     histogram=False, count=False, collection=S2_SR):
+        def compute():
+            region = self._geometry(geometry)
+            ndvi = self._ndvi_composite(self._collection(collection, region, start_date, end_date), collection)
+            return _prefixed(ndvi.reduceRegion(
+                reducer=self._reducer(std, percentiles, histogram, count),
+                geometry=region,
+                scale=scale,
+                maxPixels=1e9
+            ).getInfo() or {})
+
+        args = (geometry, start_date, end_date, scale, std, list(percentiles), histogram, count, collection)
+        return self._record('region_stats', args, compute)
+
+    def regions_stats(self, regions, start_date, end_date, scale=10, std=True, percentiles=(),
+                      histogram=False, count=False, image_count=False, collection=S2_SR, bounds=None):
+        import ee
+
+        def compute():
+            features = ee.FeatureCollection([
+                ee.Feature(self._geometry(geometry), {'region_id': region_id})
+                for region_id, geometry in regions
+            ])
+            filter_bounds = self._geometry(bounds) if bounds else features.geometry()
+            images = self._collection(collection, filter_bounds, start_date, end_date)
+            if image_count:
+                features = features.map(
+                    lambda feature: feature.set('image_count', images.filterBounds(feature.geometry()).size())
+                )
+            reduced = self._ndvi_composite(images, collection).reduceRegions(
+                collection=features,
+                reducer=self._reducer(std, percentiles, histogram, count),
+                scale=scale
+            ).select(['.*'], None, False)  # Tanpa geometri agar payload kecil
+            return [_prefixed(feature['properties']) for feature in reduced.getInfo()['features']]
+
+        args = (regions, start_date, end_date, scale, std, list(percentiles), histogram, count,
+                image_count, collection, bounds)
+        return self._record('regions_stats', args, compute)
+
+    def window_series(self, geometry, windows, scale=30):
+        import ee
+
+        def compute():
+            region = self._geometry(geometry)
+            images = self._collection(S2_TOA, region, windows[0]['start'], windows[-1]['end']) \
+                .map(lambda image: image.normalizedDifference(['B8', 'B4']).rename('NDVI'))
+
+            def reduce_window(window):
+                window = ee.Dictionary(window)
+                period_collection = images.filterDate(window.get('start'), window.get('end'))
+                image_count = period_collection.size()
+
+                # Median hanya dihitung jika periode memiliki image
+                stats = ee.Dictionary(ee.Algorithms.If(
+                    image_count.gt(0),
+                    period_collection.median().reduceRegion(
+                        reducer=ee.Reducer.mean().combine(
+                            reducer2=ee.Reducer.count(),
+                            sharedInputs=True
+                        ),
+                        geometry=region,
+                        scale=scale,
+                        maxPixels=1e8
+                    ),
+                    ee.Dictionary({'NDVI_mean': None, 'NDVI_count': 0})
+                ))
+
+                # Feature dipakai sebagai wadah karena properti null boleh kosong
+                return ee.Feature(None, {
+                    'image_count': image_count,
+                    'ndvi': stats.get('NDVI_mean'),
+                    'valid_pixels': stats.get('NDVI_count')
+                })
+
+            ee_windows = ee.List([{'start': w['start'], 'end': w['end']} for w in windows])
+            return [feature.get('properties', {}) for feature in ee_windows.map(reduce_window).getInfo()]
+
+        window_args = [[w['start'], w['end']] for w in windows]
+        return self._record('window_series', (geometry, window_args, scale), compute)
+
+    def map_id(self, geometry, start_date, end_date, vis_params):
+        def compute():
+            region = self._geometry(geometry)
+            ndvi = self._collection(S2_SR, region, start_date, end_date).median().clip(region) \
+                .normalizedDifference(['B8', 'B4']).rename('NDVI')
+            ndvi_map_id = ndvi.getMapId(vis_params)
+            return {
+                'tile_url': ndvi_map_id['tile_fetcher'].url_format,
+                'map_id': ndvi_map_id['mapid'],
+                'token': ndvi_map_id['token']
+            }
+
+        return self._record('map_id', (geometry, start_date, end_date, vis_params), compute)
+
+    def describe(self):
+        return {'name': self.name, 'recording': self.recording.path if self.recording else None}
+
+
+def _geometry_points(geometry):
+    """Semua koordinat [lon, lat] dari geometri GeoJSON"""
+    if geometry.get('type') == 'GeometryCollection':
+        return [point for part in geometry.get('geometries', []) for point in _geometry_points(part)]
+    coordinates = np.asarray(geometry.get('coordinates', []), dtype=object)
+
+    def flatten(value):
+        if len(value) and isinstance(value[0], (int, float)):
+            return [value[:2]]
+        return [point for item in value for point in flatten(item)]
+
+    return flatten(coordinates.tolist() if coordinates.ndim else [])
+
+
+def _area_m2(geometry):
+    """Perkiraan luas dari bounding box (atau lingkaran untuk titik dengan buffer)"""
+    if geometry.get('buffer_m'):
+        return math.pi * geometry['buffer_m'] ** 2
+    points = np.asarray(_geometry_points(geometry), dtype=np.float64)
+    if not len(points):
+        return 0.0
+    width = (points[:, 0].max() - points[:, 0].min()) * 111320 * math.cos(math.radians(points[:, 1].mean()))
+    height = (points[:, 1].max() - points[:, 1].min()) * 110540
+    return float(width * height)
+
+
+def build_synthetic_catalog(district_coordinates, half_size_deg=0.008):
+    """
+    Katalog kecamatan sintetis (persegi di sekitar koordinat default) untuk
+    sumber lokal jika katalog hasil GEE belum tersimpan
+    """
+    districts = {}
+    squares = []
+    for name, (latitude, longitude) in district_coordinates.items():
+        ring = [
+            [longitude - half_size_deg, latitude - half_size_deg],
+            [longitude + half_size_deg, latitude - half_size_deg],
+            [longitude + half_size_deg, latitude + half_size_deg],
+            [longitude - half_size_deg, latitude + half_size_deg],
+            [longitude - half_size_deg, latitude - half_size_deg]
+        ]
+        geometry = {'type': 'Polygon', 'coordinates': [ring]}
+        squares.append([ring])
+        districts[name] = {
+            'name': name,
+            'geometry': geometry,
+            'simplified_geometry': geometry,
+            'centroid': [latitude, longitude],
+            'bbox': [ring[0][0], ring[0][1], ring[2][0], ring[2][1]],
+            'area_km2': _area_m2(geometry) / 1e6,
+            'properties': {'NAME_2': 'Kota Semarang', 'NAME_3': name}
+        }
+
+    bbox = [
+        min(entry['bbox'][0] for entry in districts.values()),
+        min(entry['bbox'][1] for entry in districts.values()),
+        max(entry['bbox'][2] for entry in districts.values()),
+        max(entry['bbox'][3] for entry in districts.values())
+    ]
+    bounds_ring = [[bbox[0], bbox[1]], [bbox[2], bbox[1]], [bbox[2], bbox[3]], [bbox[0], bbox[3]], [bbox[0], bbox[1]]]
+    return {
+        'version': 1,
+        'built_at': None,
+        'asset': 'synthetic',
+        'districts': districts,
+        'city': {
+            'name': 'Kota Semarang',
+            'geometry': {'type': 'MultiPolygon', 'coordinates': squares},
+            'bounds': {'type': 'Polygon', 'coordinates': [bounds_ring]},
+            'bbox': bbox,
+            'area_km2': sum(entry['area_km2'] for entry in districts.values())
+        }
+    }
+
+
+class LocalNDVISource(NDVISource):
+    """Respons rekaman atau sintetis dengan latency buatan; tanpa jaringan"""
+
+    name = 'local'
+
+    def __init__(self, district_coordinates=None, recording_path=None, latency_ms=0.0, jitter_ms=0.0):
+        self.district_coordinates = district_coordinates or {}
+        self.recording = Recording(recording_path) if recording_path else None
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(0)
+        self._random_lock = threading.Lock()
+        self.calls = 0
+        self.recorded_hits = 0
+
+    def _sleep(self):
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return
+        with self._random_lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    def _serve(self, method, args, synthesize):
+        self._sleep()
+        recorded = self.recording.get(Recording.key(method, *args)) if self.recording is not None else None
+        with self._random_lock:
+            self.calls += 1
+            if recorded is not None:
+                self.recorded_hits += 1
+        return recorded if recorded is not None else synthesize()
+
+    @staticmethod
+    def _rng(*parts):
+        return np.random.default_rng(zlib.crc32(geometry_hash(list(parts)).encode('utf-8')))
+
+    def initialize(self):
+        print(f"Sumber NDVI lokal aktif (latency {self.latency_ms:.0f} ± {self.jitter_ms:.0f} ms)")
+        return True
+
+    def load_district_catalog(self):
+        from district_catalog import load_district_catalog
+        catalog = load_district_catalog(build_if_missing=False)
+        if catalog:
+            return catalog
+        print("Memakai katalog kecamatan sintetis")
+        return build_synthetic_catalog(self.district_coordinates)
+
+    def _synthetic_stats(self, geometry, start_date, end_date, scale, std, percentiles, histogram, count):
+        rng = self._rng(geometry, start_date, end_date)
+        mean = float(rng.uniform(0.25, 0.65))
+        spread = float(rng.uniform(0.08, 0.2))
+        pixels = max(1.0, round(_area_m2(geometry) / (scale * scale)))
+        sketch = simulated_histogram(mean, spread, pixels)
+
+        stats = {
+            'NDVI_mean': sketch.mean(),
+            'NDVI_min': sketch.quantile(0.001),
+            'NDVI_max': sketch.quantile(0.999)
+        }
+        edges = bin_edges()
+        if std:
+            centers = (edges[:-1] + edges[1:]) / 2
+            stats['NDVI_stdDev'] = float(np.sqrt(np.average((centers - stats['NDVI_mean']) ** 2, weights=sketch.counts)))
+        for p in percentiles:
+            stats[f'NDVI_p{p}'] = sketch.quantile(p / 100)
+        if count:
+            stats['NDVI_count'] = int(pixels)
+        if histogram:
+            stats['NDVI_histogram'] = [[float(edge), float(c)] for edge, c in zip(edges[:-1], sketch.counts)]
+        return stats
+
+    def region_stats(self, geometry, start_date, end_date, scale=10, std=True, percentiles=(),
+                     histogram=False, count=False, collection=S2_SR):
+        args = (geometry, start_date, end_date, scale, std, list(percentiles), histogram, count, collection)
+        return self._serve('region_stats', args, lambda: self._synthetic_stats(
+            geometry, start_date, end_date, scale, std, percentiles, histogram, count
+        ))
+
+    def regions_stats(self, regions, start_date, end_date, scale=10, std=True, percentiles=(),
+                      histogram=False, count=False, image_count=False, collection=S2_SR, bounds=None):
+        def synthesize():
+            results = []
+            for region_id, geometry in regions:
+                properties = self._synthetic_stats(
+                    geometry, start_date, end_date, scale, std, percentiles, histogram, count
+                )
+                properties['region_id'] = region_id
+                if image_count:
+                    properties['image_count'] = int(self._rng(geometry, start_date, 'images').integers(3, 13))
+                results.append(properties)
+            return results
+
+        args = (regions, start_date, end_date, scale, std, list(percentiles), histogram, count,
+                image_count, collection, bounds)
+        return self._serve('regions_stats', args, synthesize)
+
+    def window_series(self, geometry, windows, scale=30):
+        def synthesize():
+            rng = self._rng(geometry, 'series')
+            base = float(rng.uniform(0.3, 0.6))
+            pixels = max(1, int(_area_m2(geometry) / (scale * scale)))
+            series = []
+            for window in windows:
+                day = int(np.datetime64(window['start'], 'D').astype(np.int64))
+                window_rng = self._rng(geometry, window['start'])
+                image_count = int(window_rng.integers(0, 4))
+                ndvi = base + 0.08 * math.sin(2 * math.pi * day / 365) + float(window_rng.normal(0, 0.02))
+                series.append({
+                    'image_count': image_count,
+                    'ndvi': float(min(0.9, max(0.05, ndvi))) if image_count else None,
+                    'valid_pixels': pixels if image_count else 0
+                })
+            return series
+
+        window_args = [[w['start'], w['end']] for w in windows]
+        return self._serve('window_series', (geometry, window_args, scale), synthesize)
+
+    def map_id(self, geometry, start_date, end_date, vis_params):
+        def synthesize():
+            map_id = geometry_hash([geometry, start_date, end_date, vis_params])[:16]
+            return {
+                'tile_url': f"local://ndvi/{map_id}/{{z}}/{{x}}/{{y}}",
+                'map_id': map_id,
+                'token': ''
+            }
+
+        return self._serve('map_id', (geometry, start_date, end_date, vis_params), synthesize)
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'latency_ms': self.latency_ms,
+            'jitter_ms': self.jitter_ms,
+            'recording': self.recording.path if self.recording else None,
+            'recorded_responses': len(self.recording.responses) if self.recording else 0,
+            'calls': self.calls,
+            'recorded_hits': self.recorded_hits
+        }
+
+
+# Metode sumber yang masing-masing satu round trip GEE
+ROUND_TRIPS = {
+    'region_stats': 'getInfo',
+    'regions_stats': 'getInfo',
+    'window_series': 'getInfo',
+    'map_id': 'getMapId'
+}
+
+
+class ObservedNDVISource:
+    """
+    Meneruskan semua atribut ke sumber asli dan melaporkan setiap round trip
+    ke observe(call, method, detik, error) untuk metrik
+    """
+
+    def __init__(self, source, observe):
+        self.source = source
+        self.observe = observe
+
+    def __getattr__(self, name):
+        attribute = getattr(self.source, name)
+        call = ROUND_TRIPS.get(name)
+        if call is None:
+            return attribute
+
+        def observed(*args, **kwargs):
+            start = time.perf_counter()
+            error = False
+            try:
+                return attribute(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                self.observe(call, name, time.perf_counter() - start, error)
+
+        return observed
+
+
+def create_ndvi_source(district_coordinates=None):
+    """Sumber NDVI sesuai env NDVI_SOURCE (default gee)"""
+    source_name = os.environ.get('NDVI_SOURCE', 'gee').lower()
+    recording_path = os.environ.get('NDVI_SOURCE_RECORDING') or None
+    if source_name == 'local':
+        return LocalNDVISource(
+            district_coordinates,
+            recording_path=recording_path,
+            latency_ms=float(os.environ.get('LOCAL_SOURCE_LATENCY_MS', 0)),
+            jitter_ms=float(os.environ.get('LOCAL_SOURCE_JITTER_MS', 0))
+        )
+    if source_name != 'gee':
+        raise ValueError(f"NDVI_SOURCE tidak dikenal: {source_name}")
+    return GEENDVISource(recording_path=recording_path)
@@ -0,0 +1,212 @@
+"""
+Penyimpanan seri waktu NDVI per kecamatan di disk.
+Satu baris per periode komposit (window) berisi tanggal mulai, jumlah hari,
+nilai NDVI, jumlah piksel valid, dan jumlah image. Setiap kecamatan disimpan
+sebagai file record biner (dtype terstruktur NumPy) yang hanya ditambah di
+akhir (append-only) dan dibaca dengan np.memmap, sehingga membaca riwayat
+tidak memanggil GEE dan sebanding dengan jumlah window, bukan jumlah hari.
+Window yang lebih lama dari data tersimpan (backfill) ditulis ulang secara
+atomik. Nilai harian atau per langkah N hari dibentuk saat dibaca.
+Penulisan memakai lock file sehingga server dan ingest.py aman menulis bersamaan.
+"""
+
+import os
+import json
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from file_lock import FileLock
+
+WINDOW_DTYPE = np.dtype([
+    ('start', '<i4'),          # Hari sejak 1970-01-01
+    ('days', '<i2'),
+    ('ndvi', '<f4'),           # NaN jika window kosong
+    ('valid_pixels', '<f4'),
+    ('image_count', '<i2')
+])
+
+EPOCH = date(1970, 1, 1)
+
+
+def to_day(value):
+    """'YYYY-MM-DD' / date / datetime -> hari sejak epoch"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d').date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def from_day(day):
+    return (EPOCH + timedelta(days=int(day))).strftime('%Y-%m-%d')
+
+
+def _safe_name(district_name):
+    return ''.join(c if c.isalnum() else '_' for c in district_name)
+
+
+def windows_to_records(windows):
+    """
+    List dict window (start, days, ndvi, valid_pixels, image_count) -> array terstruktur.
+    Window kosong (tanpa image atau NDVI <= 0) disimpan dengan NDVI NaN.
+    """
+    records = np.zeros(len(windows), dtype=WINDOW_DTYPE)
+    for i, window in enumerate(windows):
+        ndvi_value = window.get('ndvi')
+        empty = window.get('empty') or not window.get('image_count') or ndvi_value is None or ndvi_value <= 0
+        records[i] = (
+            to_day(window['start']),
+            window['days'],
+            np.nan if empty else ndvi_value,
+            window.get('valid_pixels') or 0,
+            window.get('image_count') or 0
+        )
+    return records
+
+
+class NDVITimeSeriesStore:
+    """Seri window NDVI per kecamatan (satu file .bin per kecamatan)"""
+
+    def __init__(self, directory, interval_days=10):
+        self.directory = directory
+        self.interval_days = interval_days
+        self._lock = FileLock(os.path.join(directory, '.lock'))
+
+    def _path(self, district_name):
+        return os.path.join(self.directory, f"{_safe_name(district_name)}.bin")
+
+    def _write_meta(self):
+        meta_path = os.path.join(self.directory, 'meta.json')
+        if os.path.exists(meta_path):
+            return
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'interval_days': self.interval_days,
+                'dtype': [[name, WINDOW_DTYPE[name].str] for name in WINDOW_DTYPE.names]
+            }, f)
+        os.replace(tmp_path, meta_path)
+
+    def read(self, district_name):
+        """Semua window tersimpan (memmap read-only); array kosong jika belum ada"""
+        path = self._path(district_name)
+        if not os.path.exists(path) or os.path.getsize(path) < WINDOW_DTYPE.itemsize:
+            return np.zeros(0, dtype=WINDOW_DTYPE)
+        count = os.path.getsize(path) // WINDOW_DTYPE.itemsize
+        return np.memmap(path, dtype=WINDOW_DTYPE, mode='r', shape=(count,))
+
+    def coverage(self, district_name):
+        """(tanggal mulai window pertama, tanggal akhir window terakhir) atau None"""
+        records = self.read(district_name)
+        if not len(records):
+            return None
+        last = records[-1]
+        return from_day(records[0]['start']), from_day(last['start'] + last['days'] - 1)
+
+    def append(self, district_name, windows):
+        """
+        Tambahkan window baru di akhir file. Window yang sudah tercakup
+        dilewati; window yang lebih awal dari data tersimpan memicu backfill.
+        Returns:
+            Jumlah window yang ditulis
+        """
+        records = windows_to_records(windows)
+        if not len(records):
+            return 0
+        records = records[np.argsort(records['start'], kind='stable')]
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write_meta()
+            existing = self.read(district_name)
+            if len(existing) and records[0]['start'] < existing[0]['start']:
+                return self._rewrite(district_name, existing, records)
+
+            if len(existing):
+                next_start = int(existing[-1]['start']) + int(existing[-1]['days'])
+                records = records[records['start'] >= next_start]
+            if not len(records):
+                return 0
+            with open(self._path(district_name), 'ab') as f:
+                f.write(records.tobytes())
+            return len(records)
+
+    def backfill(self, district_name, windows):
+        """Gabungkan window (termasuk yang lebih lama) lalu tulis ulang file secara atomik"""
+        records = windows_to_records(windows)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write_meta()
+            return self._rewrite(district_name, self.read(district_name), records)
+
+    def _rewrite(self, district_name, existing, records):
+        # Data tersimpan diutamakan; window baru hanya mengisi tanggal mulai yang belum ada
+        known = set(existing['start'].tolist())
+        added = records[~np.isin(records['start'], list(known))]
+        merged = np.concatenate([np.asarray(existing), added])
+        merged = merged[np.argsort(merged['start'], kind='stable')]
+
+        path = self._path(district_name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(merged.tobytes())
+        os.replace(tmp_path, path)
+        return len(added)
+
+    def daily(self, district_name, start_date=None, end_date=None, default=0.4):
+        """
+        Nilai NDVI harian (float32) dari window tersimpan.
+        Window kosong diisi nilai window sebelumnya (forward-fill), atau
+        default jika belum ada nilai sama sekali.
+        """
+        records = self.read(district_name)
+        if not len(records):
+            return np.zeros(0, dtype=np.float32)
+
+        values = np.array(records['ndvi'], dtype=np.float32)
+        empty = np.isnan(values)
+        if empty.any():
+            # Forward-fill dengan index nilai valid terakhir
+            last_valid = np.where(~empty, np.arange(len(values)), -1)
+            np.maximum.accumulate(last_valid, out=last_valid)
+            values = np.where(last_valid >= 0, values[np.maximum(last_valid, 0)], default).astype(np.float32)
+
+        days = np.asarray(records['days'], dtype=np.int64)
+        daily = np.repeat(values, days)
+        first_day = int(records[0]['start'])
+
+        lo = 0 if start_date is None else max(0, to_day(start_date) - first_day)
+        hi = len(daily) if end_date is None else max(0, to_day(end_date) - first_day + 1)
+        return daily[lo:hi]
+
+    def resample(self, district_name, step_days, start_date=None, end_date=None):
+        """
+        Rata-rata NDVI per langkah step_days dari seri harian.
+        Returns:
+            Tuple (list tanggal mulai tiap langkah, array nilai float32)
+        """
+        daily = self.daily(district_name, start_date, end_date)
+        if not len(daily):
+            return [], np.zeros(0, dtype=np.float32)
+        records = self.read(district_name)
+        first_day = int(records[0]['start']) if start_date is None else max(to_day(start_date), int(records[0]['start']))
+
+        offsets = np.arange(0, len(daily), step_days)
+        sums = np.add.reduceat(daily.astype(np.float64), offsets)
+        lengths = np.diff(np.append(offsets, len(daily)))
+        dates = [from_day(first_day + int(offset)) for offset in offsets]
+        return dates, (sums / lengths).astype(np.float32)
+
+    def describe(self):
+        if not os.path.isdir(self.directory):
+            return {'directory': self.directory, 'districts': 0, 'windows': 0}
+        files = [name for name in os.listdir(self.directory) if name.endswith('.bin')]
+        windows = sum(os.path.getsize(os.path.join(self.directory, name)) // WINDOW_DTYPE.itemsize for name in files)
+        return {
+            'directory': self.directory,
+            'interval_days': self.interval_days,
+            'districts': len(files),
+            'windows': int(windows),
+            'bytes_per_window': WINDOW_DTYPE.itemsize
+        }
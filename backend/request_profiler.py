@@ -0,0 +1,182 @@
+"""
+Profiling opt-in per request.
+Request yang diprofil dijalankan di bawah cProfile (deterministik) sekaligus
+diambil sampelnya oleh thread sampler yang membaca stack thread request
+secara berkala. Hasil disimpan di direktori lokal:
+- <id>.pstats    : statistik cProfile (python -m pstats, snakeviz)
+- <id>.collapsed : stack hasil sampling format collapsed (flamegraph.pl, speedscope)
+- <id>.json      : metadata (route, durasi, status, jumlah sampel)
+Hanya max_profiles profil terbaru yang disimpan; yang lebih lama dihapus.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import cProfile
+import threading
+from datetime import datetime
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Ambil stack satu thread setiap interval detik dan hitung stack yang sama"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            stack = ';'.join(reversed(labels))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """Baris 'frame_root;...;frame_leaf jumlah' diurutkan dari yang terbanyak"""
+        return ''.join(
+            f"{stack} {count}\n"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1])
+        )
+
+
+class ProfileSession:
+    """Satu request yang sedang diprofil (dimulai dan dihentikan di thread request)"""
+
+    def __init__(self, profiler, route, method, sample_interval):
+        self.profiler = profiler
+        self.profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.route = route
+        self.method = method
+        self.created_at = datetime.now().isoformat()
+        self._cprofile = cProfile.Profile()
+        self._sampler = StackSampler(threading.get_ident(), sample_interval)
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._sampler.start()
+        self._cprofile.enable()
+        return self
+
+    def stop(self, status=None):
+        """Hentikan profiler dan simpan hasil; mengembalikan ID profil"""
+        self._cprofile.disable()
+        duration = time.perf_counter() - self._started
+        self._sampler.stop()
+        try:
+            return self.profiler.save(self, duration, status)
+        finally:
+            self.profiler.release()
+
+
+class RequestProfiler:
+    """Membuat sesi profiling dan menyimpan hasilnya di direktori lokal"""
+
+    def __init__(self, directory, sample_interval=0.005, max_concurrent=1, max_profiles=100):
+        """
+        Args:
+            sample_interval: Interval sampling stack (detik)
+            max_concurrent: Jumlah request yang boleh diprofil bersamaan
+            max_profiles: Jumlah profil terbaru yang disimpan di directory
+        """
+        self.directory = directory
+        self.sample_interval = sample_interval
+        self.max_profiles = max(1, max_profiles)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+
+    def start(self, route, method):
+        """Mulai sesi; None jika slot profiling sedang terpakai semua"""
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            return ProfileSession(self, route, method, self.sample_interval).start()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self):
+        self._slots.release()
+
+    def _path(self, profile_id, extension):
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def save(self, session, duration, status):
+        os.makedirs(self.directory, exist_ok=True)
+        session._cprofile.dump_stats(self._path(session.profile_id, 'pstats'))
+        with open(self._path(session.profile_id, 'collapsed'), 'w') as f:
+            f.write(session._sampler.collapsed())
+
+        meta = {
+            'id': session.profile_id,
+            'route': session.route,
+            'method': session.method,
+            'status': status,
+            'created_at': session.created_at,
+            'duration_ms': duration * 1000,
+            'samples': session._sampler.samples,
+            'sample_interval_ms': self.sample_interval * 1000,
+            'files': {kind: f"{session.profile_id}.{kind}" for kind in ('pstats', 'collapsed')}
+        }
+        with open(self._path(session.profile_id, 'json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        print(f"Profil request {session.method} {session.route} disimpan: {session.profile_id} ({duration * 1000:.0f} ms)")
+        self.prune()
+        return session.profile_id
+
+    def _profile_ids(self):
+        """ID profil tersimpan, paling baru dulu (ID diawali timestamp)"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted((name[:-len('.json')] for name in os.listdir(self.directory) if name.endswith('.json')), reverse=True)
+
+    def prune(self):
+        """Hapus profil di luar max_profiles terbaru"""
+        for profile_id in self._profile_ids()[self.max_profiles:]:
+            for kind in ('json', 'pstats', 'collapsed'):
+                try:
+                    os.remove(self._path(profile_id, kind))
+                except FileNotFoundError:
+                    pass
+
+    def list_profiles(self, limit=50):
+        """Metadata profil terbaru (paling baru dulu)"""
+        profiles = []
+        for profile_id in self._profile_ids()[:limit]:
+            try:
+                with open(self._path(profile_id, 'json'), 'r') as f:
+                    profiles.append(json.load(f))
+            except Exception as e:
+                print(f"Error reading profile metadata {profile_id}: {e}")
+        return profiles
+
+    def file_path(self, profile_id, kind):
+        """Path file profil (kind: pstats, collapsed, json); None jika tidak ada atau ID tidak valid"""
+        if kind not in ('pstats', 'collapsed', 'json') or not all(c.isalnum() or c == '-' for c in profile_id):
+            return None
+        path = self._path(profile_id, kind)
+        return path if os.path.exists(path) else None
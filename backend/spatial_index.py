@@ -0,0 +1,193 @@
+"""
+Indeks spasial lokal untuk lookup koordinat -> kecamatan tanpa panggilan GEE.
+Polygon kecamatan dari katalog lokal dipecah menjadi array edge NumPy.
+Bounding box dikelompokkan dengan packing Sort-Tile-Recursive (STR) menjadi
+node R-tree satu tingkat, lalu kandidat diuji point-in-polygon dengan aturan
+even-odd (lubang dan MultiPolygon ikut tertangani). Banyak titik diproses
+sekaligus secara tervektorisasi.
+"""
+
+import math
+
+import numpy as np
+
+# Batas elemen matriks (titik x edge) per chunk agar memori tetap kecil
+MAX_CHUNK_ELEMENTS = 2_000_000
+
+
+def _geometry_rings(geometry):
+    """Semua ring (luar dan lubang) dari geometri GeoJSON sebagai array (n, 2)"""
+    geometry_type = geometry.get('type')
+    if geometry_type == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif geometry_type == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    elif geometry_type == 'GeometryCollection':
+        return [ring for part in geometry.get('geometries', []) for ring in _geometry_rings(part)]
+    else:
+        return []
+
+    rings = []
+    for polygon in polygons:
+        for ring in polygon:
+            ring = np.asarray(ring, dtype=np.float64)[:, :2]
+            if len(ring) < 3:
+                continue
+            if not np.array_equal(ring[0], ring[-1]):
+                ring = np.vstack([ring, ring[:1]])
+            rings.append(ring)
+    return rings
+
+
+def _ring_edges(rings):
+    """Edge (x1, y1, x2, y2) semua ring, shape (m, 4)"""
+    return np.concatenate([np.hstack([ring[:-1], ring[1:]]) for ring in rings])
+
+
+def points_in_polygon(edges, lons, lats):
+    """
+    Uji even-odd (ray casting ke arah +x) untuk banyak titik terhadap satu polygon
+    Returns:
+        Array bool per titik
+    """
+    x1, y1, x2, y2 = edges.T
+    inside = np.zeros(len(lons), dtype=bool)
+    chunk = max(1, MAX_CHUNK_ELEMENTS // max(1, len(edges)))
+
+    for start in range(0, len(lons), chunk):
+        xs = lons[start:start + chunk, None]
+        ys = lats[start:start + chunk, None]
+        spans = (y1 > ys) != (y2 > ys)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x1 + (ys - y1) * (x2 - x1) / (y2 - y1)
+        crossings = np.count_nonzero(spans & (xs < x_cross), axis=1)
+        inside[start:start + chunk] = crossings % 2 == 1
+
+    return inside
+
+
+def _bbox_contains(bboxes, lons, lats):
+    """Matriks (n_titik, n_bbox) titik berada di dalam bbox [min_lon, min_lat, max_lon, max_lat]"""
+    return (
+        (lons[:, None] >= bboxes[:, 0]) & (lons[:, None] <= bboxes[:, 2]) &
+        (lats[:, None] >= bboxes[:, 1]) & (lats[:, None] <= bboxes[:, 3])
+    )
+
+
+def str_pack(bboxes, node_capacity):
+    """
+    Urutan Sort-Tile-Recursive: sort berdasarkan pusat x, bagi menjadi slice
+    vertikal, lalu sort tiap slice berdasarkan pusat y.
+    Returns:
+        List array index per node (maksimal node_capacity anggota)
+    """
+    n = len(bboxes)
+    if n == 0:
+        return []
+    centers = np.column_stack([
+        (bboxes[:, 0] + bboxes[:, 2]) / 2,
+        (bboxes[:, 1] + bboxes[:, 3]) / 2
+    ])
+    n_nodes = math.ceil(n / node_capacity)
+    n_slices = math.ceil(math.sqrt(n_nodes))
+    slice_size = n_slices * node_capacity
+
+    nodes = []
+    by_x = np.argsort(centers[:, 0], kind='stable')
+    for start in range(0, n, slice_size):
+        members = by_x[start:start + slice_size]
+        members = members[np.argsort(centers[members, 1], kind='stable')]
+        nodes.extend(members[i:i + node_capacity] for i in range(0, len(members), node_capacity))
+    return nodes
+
+
+class DistrictIndex:
+    """R-tree (STR-packed) kecamatan untuk query titik tunggal maupun batch"""
+
+    def __init__(self, geometries, node_capacity=4):
+        """
+        Args:
+            geometries: Dict {nama kecamatan: geometri GeoJSON}
+        """
+        self.names = []
+        self.edges = []
+        bboxes = []
+        for name, geometry in geometries.items():
+            rings = _geometry_rings(geometry or {})
+            if not rings:
+                continue
+            points = np.concatenate(rings)
+            self.names.append(name)
+            self.edges.append(_ring_edges(rings))
+            bboxes.append([points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()])
+
+        self.bboxes = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+        self._bbox_list = self.bboxes.tolist()
+        self.nodes = str_pack(self.bboxes, node_capacity)
+        self.node_bboxes = np.array([
+            [self.bboxes[members, 0].min(), self.bboxes[members, 1].min(),
+             self.bboxes[members, 2].max(), self.bboxes[members, 3].max()]
+            for members in self.nodes
+        ], dtype=np.float64).reshape(-1, 4)
+        self._node_bbox_list = self.node_bboxes.tolist()
+
+    @classmethod
+    def from_catalog(cls, catalog, simplified=False):
+        """Bangun indeks dari katalog kecamatan (geometri penuh secara default)"""
+        key = 'simplified_geometry' if simplified else 'geometry'
+        geometries = {
+            name: entry.get(key) or entry.get('geometry')
+            for name, entry in catalog['districts'].items()
+        }
+        index = cls(geometries)
+        print(f"Indeks spasial dibangun: {len(index.names)} kecamatan, {len(index.nodes)} node")
+        return index
+
+    def locate_many(self, lons, lats):
+        """
+        Nama kecamatan untuk setiap titik; None jika di luar semua kecamatan
+        Args:
+            lons, lats: Array longitude dan latitude
+        """
+        lons = np.asarray(lons, dtype=np.float64).reshape(-1)
+        lats = np.asarray(lats, dtype=np.float64).reshape(-1)
+        found = np.full(len(lons), -1, dtype=np.int64)
+        if not self.names or not len(lons):
+            return [None] * len(lons)
+
+        in_nodes = _bbox_contains(self.node_bboxes, lons, lats)
+        for node_id, members in enumerate(self.nodes):
+            node_points = np.flatnonzero(in_nodes[:, node_id] & (found < 0))
+            if not len(node_points):
+                continue
+            in_members = _bbox_contains(self.bboxes[members], lons[node_points], lats[node_points])
+            for column, district_id in enumerate(members):
+                candidates = node_points[in_members[:, column] & (found[node_points] < 0)]
+                if not len(candidates):
+                    continue
+                inside = points_in_polygon(self.edges[district_id], lons[candidates], lats[candidates])
+                found[candidates[inside]] = district_id
+
+        return [self.names[i] if i >= 0 else None for i in found]
+
+    def locate(self, longitude, latitude):
+        """Nama kecamatan yang memuat titik (longitude, latitude); None jika tidak ada"""
+        # Jalur skalar: overhead broadcasting NumPy mendominasi untuk satu titik
+        point = (np.array([longitude], dtype=np.float64), np.array([latitude], dtype=np.float64))
+        for (min_lon, min_lat, max_lon, max_lat), members in zip(self._node_bbox_list, self.nodes):
+            if not (min_lon <= longitude <= max_lon and min_lat <= latitude <= max_lat):
+                continue
+            for district_id in members:
+                min_lon, min_lat, max_lon, max_lat = self._bbox_list[district_id]
+                if not (min_lon <= longitude <= max_lon and min_lat <= latitude <= max_lat):
+                    continue
+                if points_in_polygon(self.edges[district_id], *point)[0]:
+                    return self.names[district_id]
+        return None
+
+    def describe(self):
+        return {
+            'districts': len(self.names),
+            'nodes': len(self.nodes),
+            'edges': int(sum(len(edges) for edges in self.edges))
+        }
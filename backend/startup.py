@@ -0,0 +1,73 @@
+"""
+Pelacakan kesiapan dependency saat startup (GEE, katalog kecamatan, model).
+Dependency dimuat di thread warm-up background; endpoint yang membutuhkan
+dependency tertentu menunggu sampai dependency tersebut siap.
+"""
+
+import time
+import threading
+import traceback
+
+
+class Readiness:
+    """Status ready/latency/error per dependency beserta Event untuk menunggu"""
+
+    def __init__(self, names):
+        self._events = {name: threading.Event() for name in names}
+        self._status = {
+            name: {'ready': False, 'latency_ms': None, 'error': None}
+            for name in names
+        }
+        self._lock = threading.Lock()
+        self._started = False
+
+    def run(self, name, loader):
+        """Jalankan loader untuk satu dependency dan catat latency/error-nya"""
+        start = time.perf_counter()
+        try:
+            result = loader()
+            error = None
+        except Exception as e:
+            traceback.print_exc()
+            result = None
+            error = str(e)
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self._status[name] = {
+            'ready': error is None,
+            'latency_ms': round(latency_ms, 1),
+            'error': error
+        }
+        # Event tetap di-set saat gagal agar request tidak menunggu selamanya
+        self._events[name].set()
+        print(f"Startup: {name} {'siap' if error is None else 'gagal'} dalam {latency_ms:.0f} ms")
+        return result
+
+    def start_once(self, target, blocking=False):
+        """Jalankan warm-up hanya sekali per proses (di thread background kecuali blocking)"""
+        with self._lock:
+            if self._started:
+                return False
+            self._started = True
+
+        if blocking:
+            target()
+        else:
+            threading.Thread(target=target, name='startup-warmup', daemon=True).start()
+        return True
+
+    def wait(self, *names, timeout=None):
+        """Tunggu sampai semua dependency selesai dimuat (berhasil atau gagal)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._events[name].wait(remaining):
+                return False
+        return True
+
+    def is_ready(self, *names):
+        names = names or tuple(self._status)
+        return all(self._status[name]['ready'] for name in names)
+
+    def snapshot(self):
+        return {name: dict(status) for name, status in self._status.items()}
@@ -598,7 +598,8 @@ async function runNDVIPrediction(districtName) {
             },
             body: JSON.stringify({
                 district_name: districtName,
-                prediction_days: predictionDays
+                prediction_days: predictionDays,
+                format: 'series'
             })
         });
         
@@ -612,7 +613,8 @@ async function runNDVIPrediction(districtName) {
                 },
                 body: JSON.stringify({
                     district_name: districtName,
-                    prediction_days: 14
+                    prediction_days: 14,
+                    format: 'series'
                 })
             });
             if (!response.ok) {
@@ -1781,7 +1783,8 @@ async function predictNDVI() {
             },
             body: JSON.stringify({
                 district_name: selectedDistrict,
-                prediction_days: predictionDays
+                prediction_days: predictionDays,
+                format: 'series'
             })
         });
         
@@ -1902,8 +1905,11 @@ function displayNDVIPredictionResults(result) {
             console.warn('Statistik prediksi tidak tersedia');
         }
         
-        // Render grafik jika tersedia
-        if (result.plot_json) {
+        // Render grafik jika tersedia (format series dirender di klien)
+        if (result.format === 'series' && result.forecast) {
+            console.log('Series data available, building chart on client...');
+            renderNDVIChart(JSON.stringify(createSeriesChart(result)));
+        } else if (result.plot_json) {
             console.log('Plot JSON available, rendering chart...');
             console.log('Plot JSON length:', result.plot_json.length);
             console.log('About to call renderNDVIChart...');
@@ -2863,6 +2869,52 @@ function toggleDownloadButton(show = true) {
     }
 }
 
+// Fungsi untuk membuat daftar tanggal dari format series (start + step_days)
+function expandSeriesDates(series) {
+    const dates = [];
+    const start = new Date(`${series.start}T00:00:00Z`);
+    for (let i = 0; i < series.values.length; i++) {
+        const date = new Date(start);
+        date.setUTCDate(start.getUTCDate() + i * (series.step_days || 1));
+        dates.push(date.toISOString().split('T')[0]);
+    }
+    return dates;
+}
+
+// Fungsi untuk membuat chart LSTM dari respons format series
+function createSeriesChart(result) {
+    const historical = result.historical || { start: null, values: [] };
+    return {
+        data: [
+            {
+                x: historical.start ? expandSeriesDates(historical) : [],
+                y: historical.values,
+                type: 'scatter',
+                mode: 'lines+markers',
+                name: 'Data Historis',
+                line: { color: 'blue', width: 2 },
+                marker: { size: 4 }
+            },
+            {
+                x: expandSeriesDates(result.forecast),
+                y: result.forecast.values,
+                type: 'scatter',
+                mode: 'lines+markers',
+                name: result.fallback ? 'Prediksi (Fallback)' : 'Prediksi LSTM',
+                line: { color: 'red', width: 2, dash: 'dash' },
+                marker: { size: 4 }
+            }
+        ],
+        layout: {
+            title: `Prediksi NDVI untuk ${result.district_name}`,
+            xaxis: { title: 'Tanggal', type: 'date' },
+            yaxis: { title: 'Nilai NDVI' },
+            hovermode: 'x unified',
+            height: 400
+        }
+    };
+}
+
 // Fungsi untuk membuat fallback chart demo
 function createFallbackChart() {
     console.log('Creating fallback LSTM chart...');